@@ -1,6 +1,5 @@
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
@@ -10,11 +9,141 @@ OPENCAGE_API_KEY = os.getenv("OPENCAGE_API_KEY")
 OPENCAGE_BASE_URL = os.getenv("OPENCAGE_BASE_URL", "https://api.opencagedata.com/geocode/v1/json")
 WEATHER_BASE_URL = os.getenv("WEATHER_BASE_URL", "https://dragon.best/api/glax_weather.json")
 
+# HTTP Client Configuration (shared async client with keep-alive pooling)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_MAX_CONCURRENCY_PER_HOST = int(os.getenv("HTTP_MAX_CONCURRENCY_PER_HOST", "20"))
+
+# Upstream Resilience Configuration (circuit breaker, retry budget, hedging)
+UPSTREAM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_FAILURE_THRESHOLD", "5"))
+UPSTREAM_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("UPSTREAM_BREAKER_RECOVERY_TIMEOUT", "30"))
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+UPSTREAM_DEADLINE = float(os.getenv("UPSTREAM_DEADLINE", str(HTTP_TIMEOUT)))  # Seconds for one HTTP call, retries included
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.1"))
+UPSTREAM_RETRY_BUDGET_RATIO = float(os.getenv("UPSTREAM_RETRY_BUDGET_RATIO", "0.2"))
+UPSTREAM_RETRY_BUDGET_MAX = float(os.getenv("UPSTREAM_RETRY_BUDGET_MAX", "10"))
+UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "false").lower() == "true"
+UPSTREAM_HEDGE_MIN_DELAY = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", "0.05"))
+UPSTREAM_HEDGE_MIN_SAMPLES = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", "20"))
+
+# Rate Limiting Configuration (token buckets; a rate of 0 disables the limit)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis" (shared across workers)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))  # In-memory buckets kept (LRU eviction)
+CLIENT_RATE_LIMIT = float(os.getenv("CLIENT_RATE_LIMIT", "0"))  # Requests/second per client and router
+CLIENT_RATE_LIMIT_BURST = int(os.getenv("CLIENT_RATE_LIMIT_BURST", "20"))
+CLIENT_RATE_LIMIT_MAX_WAIT = float(os.getenv("CLIENT_RATE_LIMIT_MAX_WAIT", "0"))  # Seconds to queue before a 429
+CLIENT_ID_HEADER = os.getenv("CLIENT_ID_HEADER", "X-API-Key")
+# Comma-separated known client keys; other CLIENT_ID_HEADER values are ignored
+CLIENT_API_KEYS = frozenset(key.strip() for key in os.getenv("CLIENT_API_KEYS", "").split(",") if key.strip())
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+OPENCAGE_RATE_LIMIT = float(os.getenv("OPENCAGE_RATE_LIMIT", "0"))  # Requests/second (free tier: 1)
+OPENCAGE_RATE_LIMIT_BURST = int(os.getenv("OPENCAGE_RATE_LIMIT_BURST", "1"))
+GEMINI_RATE_LIMIT = float(os.getenv("GEMINI_RATE_LIMIT", "0"))  # Requests/second
+GEMINI_RATE_LIMIT_BURST = int(os.getenv("GEMINI_RATE_LIMIT_BURST", "5"))
+UPSTREAM_QUOTA_MAX_WAIT = float(os.getenv("UPSTREAM_QUOTA_MAX_WAIT", "2"))  # Seconds to queue for upstream quota
+
+# Response Compression Configuration (gzip, or brotli when the `brotli` package is installed)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Bytes; smaller bodies are sent as-is
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Tracing Configuration (optional OpenTelemetry; exporter "console", "file" or "otlp")
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "console")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "weather-clothing-api")
+
+# Shared Cache Configuration (L2 behind the in-process caches, shared by all workers;
+# "none", "sqlite" for one host or "redis" for any Redis-protocol server)
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "none")
+SHARED_CACHE_PATH = os.getenv(
+    "SHARED_CACHE_PATH",
+    "/dev/shm/weather-api-cache.sqlite3" if os.path.isdir("/dev/shm") else "weather-api-cache.sqlite3"
+)
+SHARED_CACHE_REDIS_URL = os.getenv("SHARED_CACHE_REDIS_URL", "redis://localhost:6379/1")
+SHARED_CACHE_PREFIX = os.getenv("SHARED_CACHE_PREFIX", "weather-api:")
+
+# Geocoding Cache Configuration
+GEOCODE_CACHE_MAX_SIZE = int(os.getenv("GEOCODE_CACHE_MAX_SIZE", "5000"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(7 * 24 * 3600)))
+GEOCODE_NEGATIVE_CACHE_TTL = float(os.getenv("GEOCODE_NEGATIVE_CACHE_TTL", "300"))
+
+# Offline Gazetteer Configuration (GeoNames-style file, e.g. cities15000.txt)
+GAZETTEER_FILE = os.getenv("GAZETTEER_FILE")
+GAZETTEER_MIN_POPULATION = int(os.getenv("GAZETTEER_MIN_POPULATION", "0"))
+GAZETTEER_FUZZY = os.getenv("GAZETTEER_FUZZY", "true").lower() == "true"
+GAZETTEER_FUZZY_MAX_CANDIDATES = int(os.getenv("GAZETTEER_FUZZY_MAX_CANDIDATES", "5000"))
+# Sorted name index built from GAZETTEER_FILE (default: a per-file path in the temp directory)
+GAZETTEER_INDEX_FILE = os.getenv("GAZETTEER_INDEX_FILE")
+
+# Weather Cache Configuration (grid-bucketed, stale-while-revalidate)
+WEATHER_CACHE_CELL_SIZE = float(os.getenv("WEATHER_CACHE_CELL_SIZE", "0.05"))  # degrees
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "300"))
+WEATHER_CACHE_STALE_TTL = float(os.getenv("WEATHER_CACHE_STALE_TTL", "1800"))
+WEATHER_CACHE_MAX_SIZE = int(os.getenv("WEATHER_CACHE_MAX_SIZE", "10000"))
+
+# Prefetch Configuration (keeps weather for frequently requested locations warm)
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "5"))  # Seconds between scheduler passes
+PREFETCH_HOT_SIZE = int(os.getenv("PREFETCH_HOT_SIZE", "300"))  # Locations kept warm
+PREFETCH_MIN_SCORE = float(os.getenv("PREFETCH_MIN_SCORE", "3"))  # Decayed request count to count as hot
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE", "3600"))  # Seconds for a request to lose half its weight
+PREFETCH_LEAD = float(os.getenv("PREFETCH_LEAD", "0.3"))  # Fraction of the TTL before expiry when refreshes start
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+PREFETCH_FORECAST = os.getenv("PREFETCH_FORECAST", "false").lower() == "true"  # Also keep forecast tables warm
+PREFETCH_SEED_LOCATIONS = [
+    location.strip() for location in os.getenv("PREFETCH_SEED_LOCATIONS", "").split(";") if location.strip()
+]
+PREFETCH_SEED_FILE = os.getenv("PREFETCH_SEED_FILE")  # One location per line
+
+# Forecast Configuration ("open-meteo" or the local "fixture" stand-in)
+FORECAST_PROVIDER = os.getenv("FORECAST_PROVIDER", "open-meteo")
+FORECAST_BASE_URL = os.getenv("FORECAST_BASE_URL", "https://api.open-meteo.com/v1/forecast")
+FORECAST_FIXTURE_FILE = os.getenv(
+    "FORECAST_FIXTURE_FILE",
+    os.path.join(os.path.dirname(__file__), "forecast_fixture.json")
+)
+FORECAST_HOURS = int(os.getenv("FORECAST_HOURS", "48"))
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "1800"))
+FORECAST_CACHE_MAX_SIZE = int(os.getenv("FORECAST_CACHE_MAX_SIZE", "2000"))
+
+# Clothing Rules Configuration (declarative rule table, compiled at startup)
+CLOTHING_RULES_FILE = os.getenv(
+    "CLOTHING_RULES_FILE",
+    os.path.join(os.path.dirname(__file__), "clothing_rules.json")
+)
+
+# Batch Endpoint Configuration
+BATCH_MAX_LOCATIONS = int(os.getenv("BATCH_MAX_LOCATIONS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "10"))
+
+# Subscription (WebSocket) Configuration
+SUBSCRIPTION_MAX_LOCATIONS = int(os.getenv("SUBSCRIPTION_MAX_LOCATIONS", "50"))  # Per connection
+SUBSCRIPTION_MIN_INTERVAL = float(os.getenv("SUBSCRIPTION_MIN_INTERVAL", "5"))  # Seconds between checks of one cell
+SUBSCRIPTION_QUEUE_SIZE = int(os.getenv("SUBSCRIPTION_QUEUE_SIZE", "100"))  # Pending messages per connection
+
 # Gemini API Configuration
+# The Gemini SDK is imported and configured lazily on first use, so weather-only
+# deployments start without it and without a key
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable is not set")
-genai.configure(api_key=GEMINI_API_KEY)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+# Gemini Dispatch Configuration
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))  # Generations in flight per worker
+GEMINI_QUEUE_SIZE = int(os.getenv("GEMINI_QUEUE_SIZE", "64"))  # Generations waiting for a slot before new ones are shed
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", "10"))  # Seconds before falling back to rule-based advice
+GEMINI_GENERATION_GRACE = float(os.getenv("GEMINI_GENERATION_GRACE", "5"))  # Extra seconds a generation may run to fill the cache
+
+# Gemini Response Cache Configuration
+GEMINI_CACHE_MAX_SIZE = int(os.getenv("GEMINI_CACHE_MAX_SIZE", "2000"))
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", "1800"))
+GEMINI_CACHE_TEMPERATURE_BUCKET = float(os.getenv("GEMINI_CACHE_TEMPERATURE_BUCKET", "2"))  # °C
+GEMINI_CACHE_FILE = os.getenv("GEMINI_CACHE_FILE")  # Optional path to persist the cache across restarts
 
 # App Configuration
 APP_TITLE = "Weather-Based Clothing Recommendation Chatbot API"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 
 class LocationRequest(BaseModel):
@@ -30,4 +30,36 @@ class ChatbotResponse(BaseModel):
 
 class ChatRequest(BaseModel):
     location: str
-    question: Optional[str] = None  # Optional question for Gemini AI
\ No newline at end of file
+    question: Optional[str] = None  # Optional question for Gemini AI
+
+
+class BatchChatRequest(BaseModel):
+    locations: List[str]
+
+
+class BatchItemResult(BaseModel):
+    location: str
+    clothing_recommendation: Optional[ClothingRecommendation] = None
+    status_code: int = 200
+    error: Optional[str] = None
+
+
+class BatchChatResponse(BaseModel):
+    message: str
+    results: List[BatchItemResult]
+
+
+class ForecastSlot(BaseModel):
+    time: str  # Local time at the location, e.g. "2024-05-01T08:00"
+    temperature: float
+    weather_condition: str
+    humidity: Optional[float] = None
+    wind_speed: Optional[float] = None
+    recommendations: Dict[str, str]
+    general_advice: str
+
+
+class ForecastResponse(BaseModel):
+    location: str
+    utc_offset_seconds: int = 0
+    slots: List[ForecastSlot]
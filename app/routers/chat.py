@@ -1,60 +1,163 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, Union
 
+from app.config.settings import BATCH_MAX_LOCATIONS, BATCH_CONCURRENCY
 from app.models.schemas import (
     LocationRequest,
     ChatRequest,
     ChatbotResponse,
-    ClothingRecommendation
+    ClothingRecommendation,
+    WeatherResponse,
+    BatchChatRequest,
+    BatchChatResponse,
+    BatchItemResult,
+    ForecastSlot
 )
+from app.routers.conditional import ObservationValidators
+from app.routers.rate_limits import client_rate_limit
+from app.routers.responses import dumps, json_response
 from app.services.weather_service import WeatherService
 from app.services.clothing_service import ClothingService
-from app.services.gemini_service import GeminiService
+from app.services.gemini_service import GeminiService, GeminiStreamError
+from app.services.forecast_service import ForecastService
+from app.services.prefetch import prefetcher
+from app.services.tracing import current_span, traced
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/chat",
-    tags=["chat"]
+    tags=["chat"],
+    dependencies=[Depends(client_rate_limit("chat"))]
 )
 
 
-@router.post("/", response_model=ChatbotResponse)
-async def chat(request: ChatRequest):
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens flush immediately
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format one Server-Sent Event with a JSON payload
+    """
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+async def sse_text_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
     """
-    Chat endpoint with Gemini AI integration for clothing recommendations
+    Send text chunks as "token" events followed by "done"; a stream that
+    fails part-way ends with an "error" event instead so the client knows
+    the text is incomplete
     """
     try:
-        # Get weather data
-        weather_data = await WeatherService.get_weather_for_location(request.location)
-        
-        # Get clothing recommendations
-        clothing_recommendation = ClothingService.get_clothing_recommendations(
+        async for text in chunks:
+            yield sse_event("token", {"text": text})
+    except GeminiStreamError as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    except Exception as e:
+        logger.error(f"Error in chat stream: {e!r}")
+        yield sse_event("error", {"detail": "Internal server error"})
+        return
+    yield sse_event("done", {})
+
+
+def build_clothing_recommendation(
+    weather_data: WeatherResponse,
+    recommendations: Optional[Dict[str, str]] = None
+) -> ClothingRecommendation:
+    """
+    Build the clothing recommendation for a weather observation
+    (recommendations may be passed in when already computed in a batch)
+    """
+    if recommendations is None:
+        recommendations = ClothingService.get_clothing_recommendations(
             weather_data.temperature,
             weather_data.weather_condition
         )
+    
+    return ClothingRecommendation(
+        location=weather_data.location,
+        weather=weather_data,
+        recommendations=recommendations,
+        general_advice=f"Based on the current weather in {weather_data.location}, here are my recommendations."
+    )
+
+
+def build_forecast_recommendation(
+    location: str,
+    slot: ForecastSlot
+) -> Tuple[WeatherResponse, ClothingRecommendation]:
+    """
+    Build the weather and clothing recommendation for a precomputed forecast slot
+    """
+    weather_data = WeatherResponse(
+        location=location,
+        temperature=slot.temperature,
+        weather_condition=slot.weather_condition,
+        humidity=slot.humidity,
+        wind_speed=slot.wind_speed
+    )
+    clothing_rec = ClothingRecommendation(
+        location=location,
+        weather=weather_data,
+        recommendations=slot.recommendations,
+        general_advice=f"Based on the forecast for {location} at {slot.time.replace('T', ' ')}, here are my recommendations. {slot.general_advice}"
+    )
+    return weather_data, clothing_rec
+
+
+@router.post("/", response_model=ChatbotResponse)
+@traced("chat")
+async def chat(request: ChatRequest, http_request: Request):
+    """
+    Chat endpoint with Gemini AI integration for clothing recommendations.
+    Answers based on the current observation carry validators, and a
+    matching If-None-Match is answered with 304 before Gemini is called.
+    """
+    current_span().set_attribute("location", request.location)
+    prefetcher.record(request.location)
+    try:
+        # Questions about a future time ("tomorrow at 8am") use the precomputed forecast
+        forecast_match = None
+        if request.question:
+            forecast_match = await ForecastService.find_slot_for_question(request.location, request.question)
         
-        # Create ClothingRecommendation object
-        clothing_rec = ClothingRecommendation(
-            location=weather_data.location,
-            weather=weather_data,
-            recommendations=clothing_recommendation,
-            general_advice=f"Based on the current weather in {weather_data.location}, here are my recommendations."
-        )
+        validators = None
+        if forecast_match:
+            weather_data, clothing_rec = build_forecast_recommendation(*forecast_match)
+        else:
+            # Get weather data
+            weather_data = await WeatherService.get_weather_for_location(request.location)
+            
+            validators = ObservationValidators.for_location(request.location, "chat", request.question, public=False)
+            if validators is not None and validators.is_not_modified(http_request):
+                return validators.not_modified()
+            
+            # Get clothing recommendations
+            clothing_rec = build_clothing_recommendation(weather_data)
         
         # Get Gemini AI response if question is provided
         gemini_response = None
         if request.question:
-            gemini_response = await GeminiService.get_gemini_response(
+            gemini_response, is_fallback = await GeminiService.get_gemini_response(
                 weather_data, clothing_rec, request.question
             )
+            # A fallback answer must not be revalidated as if it were the real one
+            if is_fallback:
+                validators = None
         
-        return ChatbotResponse(
+        response = json_response(ChatbotResponse(
             message="Weather and clothing recommendations retrieved successfully",
             clothing_recommendation=clothing_rec,
             gemini_response=gemini_response
-        )
+        ))
+        return validators.apply(response) if validators is not None else response
         
     except HTTPException as e:
         raise e
@@ -66,7 +169,49 @@ async def chat(request: ChatRequest):
         )
 
 
+@router.post("/stream")
+@traced("chat.stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat/: sends the clothing recommendation as a
+    "recommendation" event, then Gemini output as "token" events (SSE)
+    """
+    current_span().set_attribute("location", request.location)
+    prefetcher.record(request.location)
+    try:
+        forecast_match = None
+        if request.question:
+            forecast_match = await ForecastService.find_slot_for_question(request.location, request.question)
+        
+        if forecast_match:
+            weather_data, clothing_rec = build_forecast_recommendation(*forecast_match)
+        else:
+            weather_data = await WeatherService.get_weather_for_location(request.location)
+            clothing_rec = build_clothing_recommendation(weather_data)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error in chat stream endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+    
+    async def events() -> AsyncIterator[str]:
+        yield sse_event("recommendation", clothing_rec.model_dump())
+        if request.question:
+            async for event in sse_text_stream(
+                GeminiService.stream_gemini_response(weather_data, clothing_rec, request.question)
+            ):
+                yield event
+        else:
+            yield sse_event("done", {})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/natural", response_model=dict)
+@traced("chat.natural")
 async def natural_chat(request: dict):
     """
     Natural conversation endpoint with Gemini AI - no weather restrictions
@@ -79,10 +224,10 @@ async def natural_chat(request: dict):
         # Get natural response from Gemini without weather context
         response = await GeminiService.get_natural_response(question)
         
-        return {
+        return json_response({
             "response": response,
             "type": "natural_conversation"
-        }
+        })
         
     except HTTPException as e:
         raise e
@@ -91,4 +236,75 @@ async def natural_chat(request: dict):
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/natural/stream")
+@traced("chat.natural.stream")
+async def natural_chat_stream(request: dict):
+    """
+    Streaming variant of /chat/natural, sending Gemini output as "token" events (SSE)
+    """
+    question = request.get("question", "")
+    if not question:
+        raise HTTPException(status_code=400, detail="Question is required")
+    
+    return StreamingResponse(
+        sse_text_stream(GeminiService.stream_natural_response(question)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.post("/batch", response_model=BatchChatResponse)
+@traced("chat.batch")
+async def batch_chat(request: BatchChatRequest):
+    """
+    Clothing recommendations for many locations in one call.
+    Locations are looked up concurrently; failures are reported per item.
+    """
+    if not request.locations:
+        raise HTTPException(status_code=400, detail="At least one location is required")
+    if len(request.locations) > BATCH_MAX_LOCATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many locations (max {BATCH_MAX_LOCATIONS})"
+        )
+    
+    for location in request.locations:
+        prefetcher.record(location)
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def lookup(location: str) -> Union[WeatherResponse, BatchItemResult]:
+        try:
+            async with semaphore:
+                return await WeatherService.get_weather_for_location(location)
+        except HTTPException as e:
+            return BatchItemResult(location=location, status_code=e.status_code, error=str(e.detail))
+        except Exception as e:
+            logger.error(f"Error in batch lookup for {location}: {str(e)}")
+            return BatchItemResult(location=location, status_code=500, error=f"Internal server error: {str(e)}")
+    
+    lookups = await asyncio.gather(*(lookup(location) for location in request.locations))
+    
+    # Score every successful observation in one pass of the rule engine
+    observations = [item for item in lookups if isinstance(item, WeatherResponse)]
+    recommendations = iter(ClothingService.get_recommendations_batch(
+        (weather_data.temperature, weather_data.weather_condition, None) for weather_data in observations
+    ))
+    
+    results = []
+    for location, item in zip(request.locations, lookups):
+        if isinstance(item, WeatherResponse):
+            clothing_recommendation, _ = next(recommendations)
+            item = BatchItemResult(
+                location=location,
+                clothing_recommendation=build_clothing_recommendation(item, clothing_recommendation)
+            )
+        results.append(item)
+    failed = sum(1 for result in results if result.error)
+    
+    return json_response(BatchChatResponse(
+        message=f"Retrieved recommendations for {len(results) - failed} of {len(results)} locations",
+        results=results
+    ))
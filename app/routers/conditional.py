@@ -0,0 +1,87 @@
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+from app.config.settings import WEATHER_CACHE_TTL, WEATHER_CACHE_STALE_TTL
+from app.services.metrics import CONDITIONAL_REQUESTS
+from app.services.weather_service import WeatherService
+
+
+class ObservationValidators:
+    """
+    ETag, Last-Modified and Cache-Control for a response derived from a
+    cached weather observation. The ETag hashes the observation's cell and
+    fetch time plus whatever else shapes the response (fields, question), so
+    it can be checked before the response is built or serialized.
+    """
+
+    __slots__ = ("etag", "last_modified", "max_age", "public")
+
+    def __init__(self, etag: str, last_modified: float, max_age: int, public: bool):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.max_age = max_age
+        self.public = public
+
+    @classmethod
+    def for_location(cls, location: str, *variant: Any, public: bool = True) -> Optional["ObservationValidators"]:
+        """
+        Validators for the observation just served for location, or None when
+        it is no longer in this worker's caches
+        """
+        coordinates = WeatherService.cached_coordinates(location)
+        if coordinates is None:
+            return None
+        lat, lng, formatted_location = coordinates[0], coordinates[1], coordinates[2]
+        fetched_at = WeatherService.observation_time(lat, lng)
+        if fetched_at is None:
+            return None
+
+        identity = repr((formatted_location, WeatherService.grid_cell(lat, lng), fetched_at, variant))
+        etag = '"' + hashlib.blake2b(identity.encode("utf-8"), digest_size=12).hexdigest() + '"'
+        max_age = max(0, int(WEATHER_CACHE_TTL - (time.time() - fetched_at)))
+        return cls(etag, fetched_at, max_age, public)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        scope = "public" if self.public else "private"
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            # Matches the server side: fresh for the rest of the TTL, then served stale while refreshing
+            "Cache-Control": f"{scope}, max-age={self.max_age}, stale-while-revalidate={int(WEATHER_CACHE_STALE_TTL)}"
+        }
+
+    def is_not_modified(self, request: Request) -> bool:
+        """
+        Evaluate If-None-Match (weak comparison), or If-Modified-Since on
+        GET/HEAD requests without If-None-Match. "*" only counts on GET/HEAD:
+        a POST /chat/ answer depends on its body, so only explicit tags match.
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return request.method in ("GET", "HEAD")
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return self.etag in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or request.method not in ("GET", "HEAD"):
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(self.last_modified) <= since
+
+    def not_modified(self) -> Response:
+        CONDITIONAL_REQUESTS.labels("not_modified").inc()
+        return Response(status_code=304, headers=self.headers)
+
+    def apply(self, response: Response) -> Response:
+        CONDITIONAL_REQUESTS.labels("full").inc()
+        response.headers.update(self.headers)
+        return response
@@ -0,0 +1,46 @@
+from typing import Callable
+
+from fastapi import Request
+from starlette.requests import HTTPConnection
+
+from app.config.settings import (
+    CLIENT_RATE_LIMIT,
+    CLIENT_RATE_LIMIT_BURST,
+    CLIENT_RATE_LIMIT_MAX_WAIT,
+    CLIENT_ID_HEADER,
+    CLIENT_API_KEYS,
+    TRUST_FORWARDED_FOR
+)
+from app.services.rate_limit import quota_manager
+
+
+def client_key(request: HTTPConnection) -> str:
+    """
+    Identify the caller: the CLIENT_ID_HEADER value when it is one of
+    CLIENT_API_KEYS, otherwise the client IP (the first X-Forwarded-For hop
+    when TRUST_FORWARDED_FOR is set). Unknown keys are ignored so rotating
+    made-up values cannot mint fresh buckets.
+    """
+    api_key = request.headers.get(CLIENT_ID_HEADER)
+    if api_key and api_key in CLIENT_API_KEYS:
+        return f"key:{api_key}"
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            return f"ip:{forwarded.split(',')[0].strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def client_rate_limit(router_name: str) -> Callable:
+    """
+    Router dependency enforcing CLIENT_RATE_LIMIT per client for router_name
+    """
+    async def limit(request: Request) -> None:
+        await quota_manager.acquire(
+            router_name,
+            client_key(request),
+            CLIENT_RATE_LIMIT,
+            CLIENT_RATE_LIMIT_BURST,
+            CLIENT_RATE_LIMIT_MAX_WAIT
+        )
+    return limit
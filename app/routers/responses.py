@@ -0,0 +1,35 @@
+import json
+from typing import Any, Optional, Set
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.services.metrics import SERIALIZATION_LATENCY
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib encoder
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Compact JSON encoding of plain data, with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(content: Any, status_code: int = 200, include: Optional[Set[str]] = None) -> Response:
+    """
+    Serialize content (a Pydantic model or plain JSON data) into a response,
+    timing the serialization stage. include limits a model to those fields.
+    """
+    with SERIALIZATION_LATENCY.time():
+        if isinstance(content, BaseModel):
+            # Pydantic's Rust serializer beats orjson here (no intermediate dict)
+            body = content.model_dump_json(include=include)
+        else:
+            body = dumps(content)
+    return Response(content=body, status_code=status_code, media_type="application/json")
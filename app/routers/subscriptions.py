@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+import asyncio
+import logging
+from typing import Any
+
+from app.config.settings import CLIENT_RATE_LIMIT, CLIENT_RATE_LIMIT_BURST, SUBSCRIPTION_MAX_LOCATIONS
+from app.routers.rate_limits import client_key
+from app.services.prefetch import prefetcher
+from app.services.rate_limit import RateLimitExceeded, quota_manager
+from app.services.subscriptions import Subscriber, subscription_hub
+
+logger = logging.getLogger(__name__)
+
+# Shares the /weather prefix; WebSocket routes cannot use the weather router's HTTP rate-limit dependency
+router = APIRouter(
+    prefix="/weather",
+    tags=["weather"]
+)
+
+
+async def handle_command(subscriber: Subscriber, command: Any) -> None:
+    """
+    Apply one {"action": "subscribe" | "unsubscribe", "locations": [...]}
+    command, queueing acknowledgements and errors for the client
+    """
+    action = command.get("action") if isinstance(command, dict) else None
+    locations = command.get("locations") if isinstance(command, dict) else None
+    if action not in ("subscribe", "unsubscribe") or not isinstance(locations, list):
+        subscriber.push({"type": "error", "detail": 'Expected {"action": "subscribe" | "unsubscribe", "locations": [...]}'})
+        return
+
+    for location in locations:
+        if not isinstance(location, str) or not location.strip():
+            subscriber.push({"type": "error", "location": location, "detail": "Location must be a non-empty string"})
+        elif action == "unsubscribe":
+            subscription_hub.unsubscribe(subscriber, location)
+            subscriber.push({"type": "unsubscribed", "location": location})
+        elif location not in subscriber.locations and len(subscriber.locations) >= SUBSCRIPTION_MAX_LOCATIONS:
+            subscriber.push({
+                "type": "error",
+                "location": location,
+                "detail": f"Too many locations - a connection may follow at most {SUBSCRIPTION_MAX_LOCATIONS}"
+            })
+        else:
+            try:
+                await subscription_hub.subscribe(subscriber, location)
+            except HTTPException as e:
+                subscriber.push({"type": "error", "location": location, "detail": e.detail})
+                continue
+            prefetcher.record(location)
+
+
+@router.websocket("/subscribe")
+async def subscribe(websocket: WebSocket):
+    """
+    Follow locations over a WebSocket. Send {"action": "subscribe",
+    "locations": ["Paris", "Tokyo"]} (or "unsubscribe"); the server answers
+    with "subscribed"/"error" messages and pushes an "update" with the
+    clothing recommendation whenever it changes for a followed location.
+    """
+    try:
+        # One token per connection from the client's weather-router bucket
+        await quota_manager.acquire("weather", client_key(websocket), CLIENT_RATE_LIMIT, CLIENT_RATE_LIMIT_BURST, 0)
+    except RateLimitExceeded as e:
+        await websocket.close(code=1013, reason=e.detail)
+        return
+
+    await websocket.accept()
+    subscriber = Subscriber()
+
+    async def forward_updates() -> None:
+        try:
+            while True:
+                await websocket.send_json(await subscriber.queue.get())
+        except (WebSocketDisconnect, RuntimeError):
+            # Client went away; the receive loop cleans up
+            pass
+
+    sender = asyncio.create_task(forward_updates())
+    try:
+        while True:
+            try:
+                command = await websocket.receive_json()
+            except (ValueError, KeyError):
+                # Invalid JSON, or a binary frame (receive_json looks up the missing "text" key)
+                subscriber.push({"type": "error", "detail": "Messages must be JSON text frames"})
+                continue
+            await handle_command(subscriber, command)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription_hub.disconnect(subscriber)
+        sender.cancel()
@@ -1,32 +1,87 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 import logging
+from typing import Optional, Set
 
+from app.config.settings import FORECAST_HOURS
+from app.models.schemas import ForecastResponse, WeatherResponse
+from app.routers.conditional import ObservationValidators
+from app.routers.rate_limits import client_rate_limit
+from app.routers.responses import json_response
+from app.services.forecast_service import ForecastService
+from app.services.prefetch import prefetcher
+from app.services.tracing import current_span, traced
 from app.services.weather_service import WeatherService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/weather",
-    tags=["weather"]
+    tags=["weather"],
+    dependencies=[Depends(client_rate_limit("weather"))]
 )
 
 
-@router.get("/{location}")
-async def get_weather(location: str):
+def parse_fields(fields: Optional[str]) -> Optional[Set[str]]:
     """
-    Get weather data for a specific location (GET request example)
+    Turn a comma-separated ?fields= value into a WeatherResponse projection
     """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - WeatherResponse.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))} (available: {', '.join(WeatherResponse.model_fields)})"
+        )
+    return requested or None
+
+
+@router.get("/{location}", response_model=WeatherResponse)
+@traced("weather")
+async def get_weather(
+    request: Request,
+    location: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. temperature,humidity")
+):
+    """
+    Get current weather for a specific location (GET request example),
+    optionally trimmed to the requested fields. Supports conditional
+    requests (If-None-Match / If-Modified-Since) against the cached observation.
+    """
+    current_span().set_attribute("location", location)
+    include = parse_fields(fields)
+    prefetcher.record(location)
     try:
-        # Get coordinates
-        lat, lng, formatted_location = await WeatherService.get_coordinates(location)
+        weather = await WeatherService.get_weather_for_location(location)
         
-        # Get weather data
-        weather_data = await WeatherService.get_weather_data(lat, lng)
-        
-        return weather_data
+        validators = ObservationValidators.for_location(location, sorted(include or ()))
+        if validators is None:
+            return json_response(weather, include=include)
+        if validators.is_not_modified(request):
+            return validators.not_modified()
+        return validators.apply(json_response(weather, include=include))
         
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Unexpected error in get_weather: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{location}/forecast", response_model=ForecastResponse)
+@traced("weather.forecast")
+async def get_forecast(location: str, hours: int = Query(24, ge=1, le=FORECAST_HOURS)):
+    """
+    Get the hourly forecast with precomputed clothing recommendations per slot
+    """
+    current_span().set_attribute("location", location)
+    prefetcher.record(location)
+    try:
+        return json_response(await ForecastService.get_forecast(location, hours))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in get_forecast: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
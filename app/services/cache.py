@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned on a cache miss so that falsy values (None, {}) can be cached
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache with LRU eviction and per-entry expiry
+    """
+
+    def __init__(self, max_size: int, default_ttl: float):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Return the cached value for key, or default if it is missing or expired
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Like get(), but without counting a hit or miss or refreshing LRU order
+        (for background housekeeping)
+        """
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def remaining_ttl(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until key expires, or None if it is missing or expired
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store value under key, evicting the least recently used entries when full
+        """
+        if self.max_size <= 0:
+            return
+
+        ttl = self.default_ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def save(self, path: str) -> None:
+        """
+        Write unexpired entries to a JSON file (keys and values must be JSON serializable)
+        """
+        now = time.monotonic()
+        wall_now = time.time()
+        entries = [
+            [key, value, wall_now + (expires_at - now)]
+            for key, (expires_at, value) in self._data.items()
+            if expires_at > now
+        ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """
+        Load entries written by save(), skipping expired ones. Returns the number loaded.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache file {path}: {str(e)}")
+            return 0
+
+        wall_now = time.time()
+        loaded = 0
+        for key, value, expires_at in entries:
+            if expires_at > wall_now:
+                self.set(key, value, ttl=expires_at - wall_now)
+                loaded += 1
+        return loaded
@@ -1,4 +1,160 @@
-from typing import Dict, Optional
+import json
+import logging
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config.settings import CLOTHING_RULES_FILE
+from app.services.metrics import CLOTHING_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Distinct weather condition strings remembered by the keyword matcher
+MAX_CONDITION_MEMO = 1024
+
+
+class ClothingRuleEngine:
+    """
+    Clothing rules compiled from a declarative table (see app/config/clothing_rules.json).
+    Every combination of temperature band, condition rule and humidity state is
+    precomputed, so evaluating an observation is a bisect plus a dict lookup.
+    """
+
+    def __init__(self, rules: Dict[str, Any]):
+        bands = rules["temperature_bands"]
+        if not bands or bands[-1].get("below") is not None:
+            raise ValueError("Clothing rules need at least one band and an open-ended last band")
+
+        self._band_bounds = [band["below"] for band in bands[:-1]]
+        if self._band_bounds != sorted(self._band_bounds):
+            raise ValueError("Clothing rule temperature bands must be in ascending order")
+
+        self._condition_keywords = [tuple(rule["keywords"]) for rule in rules.get("condition_rules", [])]
+        self._advice_rules = rules.get("advice_rules", [])
+        self._advice_keywords = [tuple(rule["keywords"]) for rule in self._advice_rules]
+
+        humidity_rule = rules.get("humidity_rule")
+        self._humidity_above = humidity_rule["above"] if humidity_rule else None
+        self._humid_warm_above = humidity_rule.get("warm_above") if humidity_rule else None
+
+        self._condition_memo: Dict[str, Tuple[int, int]] = {}
+
+        # (band, condition rule, humidity state) -> recommendations, where the
+        # condition rule index len(condition_rules) means "no rule matched" and
+        # humidity state is 0 (normal), 1 (humid) or 2 (humid and warm)
+        self._recommendation_table: Dict[Tuple[int, int, int], Dict[str, str]] = {}
+        condition_rules = rules.get("condition_rules", [])
+        for band_index, band in enumerate(bands):
+            for rule_index in range(len(condition_rules) + 1):
+                for humidity_state in range(3):
+                    recommendations = dict(band["recommendations"])
+                    if rule_index < len(condition_rules):
+                        rule = condition_rules[rule_index]
+                        for field, suffix in rule.get("append", {}).items():
+                            recommendations[field] = recommendations.get(field, "") + suffix
+                        recommendations.update(rule.get("set", {}))
+                    if humidity_state and humidity_rule:
+                        recommendations.update(humidity_rule.get("set", {}))
+                        if humidity_state == 2:
+                            for field, suffix in humidity_rule.get("warm_append", {}).items():
+                                recommendations[field] = recommendations.get(field, "") + suffix
+                    self._recommendation_table[(band_index, rule_index, humidity_state)] = recommendations
+
+        # (band, advice rule, warm) -> advice, with the same "no rule matched" index
+        self._advice_table: Dict[Tuple[int, int, bool], str] = {}
+        for band_index, band in enumerate(bands):
+            for rule_index in range(len(self._advice_rules) + 1):
+                for warm in (False, True):
+                    advice = band["advice"]
+                    if rule_index < len(self._advice_rules):
+                        rule = self._advice_rules[rule_index]
+                        if "warm_above" not in rule or warm:
+                            advice += rule["advice"]
+                    self._advice_table[(band_index, rule_index, warm)] = advice
+
+    @classmethod
+    def from_file(cls, path: str) -> "ClothingRuleEngine":
+        with open(path, encoding="utf-8") as f:
+            rules = json.load(f)
+        logger.info(f"Loaded clothing rules from {path}")
+        return cls(rules)
+
+    @staticmethod
+    def _first_match(condition: str, keyword_groups: List[Tuple[str, ...]]) -> int:
+        for index, keywords in enumerate(keyword_groups):
+            if any(keyword in condition for keyword in keywords):
+                return index
+        return len(keyword_groups)
+
+    def _match_condition(self, weather_condition: str) -> Tuple[int, int]:
+        """
+        Return (condition rule index, advice rule index) for a weather condition
+        """
+        matched = self._condition_memo.get(weather_condition)
+        if matched is None:
+            condition = weather_condition.lower()
+            matched = (
+                self._first_match(condition, self._condition_keywords),
+                self._first_match(condition, self._advice_keywords)
+            )
+            if len(self._condition_memo) >= MAX_CONDITION_MEMO:
+                self._condition_memo.clear()
+            self._condition_memo[weather_condition] = matched
+        return matched
+
+    def _humidity_state(self, temperature: float, humidity: Optional[float]) -> int:
+        if self._humidity_above is None or not humidity or humidity <= self._humidity_above:
+            return 0
+        if self._humid_warm_above is not None and temperature > self._humid_warm_above:
+            return 2
+        return 1
+
+    def recommend(self, temperature: float, weather_condition: str, humidity: Optional[float] = None) -> Dict[str, str]:
+        band_index = bisect_right(self._band_bounds, temperature)
+        rule_index, _ = self._match_condition(weather_condition)
+        humidity_state = self._humidity_state(temperature, humidity)
+        return dict(self._recommendation_table[(band_index, rule_index, humidity_state)])
+
+    def advise(self, temperature: float, weather_condition: str) -> str:
+        band_index = bisect_right(self._band_bounds, temperature)
+        _, rule_index = self._match_condition(weather_condition)
+        warm = False
+        if rule_index < len(self._advice_rules):
+            warm_above = self._advice_rules[rule_index].get("warm_above")
+            warm = warm_above is not None and temperature > warm_above
+        return self._advice_table[(band_index, rule_index, warm)]
+
+    def evaluate_batch(
+        self,
+        observations: Iterable[Tuple[float, str, Optional[float]]]
+    ) -> List[Tuple[Dict[str, str], str]]:
+        """
+        Evaluate many (temperature, condition, humidity) observations in one pass.
+        Returns (recommendations, advice) per observation, in order.
+        """
+        band_bounds = self._band_bounds
+        match_condition = self._match_condition
+        humidity_state = self._humidity_state
+        recommendation_table = self._recommendation_table
+        advice_rules = self._advice_rules
+        advice_table = self._advice_table
+
+        results = []
+        for temperature, weather_condition, humidity in observations:
+            band_index = bisect_right(band_bounds, temperature)
+            rule_index, advice_index = match_condition(weather_condition)
+            warm = False
+            if advice_index < len(advice_rules):
+                warm_above = advice_rules[advice_index].get("warm_above")
+                warm = warm_above is not None and temperature > warm_above
+            results.append((
+                dict(recommendation_table[(band_index, rule_index, humidity_state(temperature, humidity))]),
+                advice_table[(band_index, advice_index, warm)]
+            ))
+        return results
+
+
+# Compiled once at import so requests only pay for table lookups
+rule_engine = ClothingRuleEngine.from_file(CLOTHING_RULES_FILE)
 
 
 class ClothingService:
@@ -7,83 +163,23 @@ class ClothingService:
         """
         Generate clothing recommendations based on weather conditions
         """
-        recommendations = {}
-        
-        # Temperature-based recommendations
-        if temperature < 10:
-            recommendations["outerwear"] = "Heavy winter coat or parka"
-            recommendations["layers"] = "Thermal underwear, sweater, and warm shirt"
-            recommendations["bottoms"] = "Warm pants or thermal leggings"
-            recommendations["footwear"] = "Insulated boots or warm shoes"
-            recommendations["accessories"] = "Hat, gloves, and warm scarf"
-        elif 10 <= temperature < 20:
-            recommendations["outerwear"] = "Light jacket or cardigan"
-            recommendations["layers"] = "Long-sleeve shirt or light sweater"
-            recommendations["bottoms"] = "Long pants or jeans"
-            recommendations["footwear"] = "Closed shoes or sneakers"
-            recommendations["accessories"] = "Light scarf (optional)"
-        elif 20 <= temperature < 25:
-            recommendations["outerwear"] = "Light cardigan or no jacket needed"
-            recommendations["layers"] = "T-shirt or light long-sleeve"
-            recommendations["bottoms"] = "Comfortable pants or light jeans"
-            recommendations["footwear"] = "Sneakers or comfortable shoes"
-            recommendations["accessories"] = "Sunglasses (optional)"
-        else:  # temperature >= 25
-            recommendations["outerwear"] = "No jacket needed"
-            recommendations["layers"] = "Light t-shirt or tank top"
-            recommendations["bottoms"] = "Shorts or light pants"
-            recommendations["footwear"] = "Sandals or breathable shoes"
-            recommendations["accessories"] = "Sunglasses and hat for sun protection"
-        
-        # Weather condition adjustments
-        weather_lower = weather_condition.lower()
-        if "rain" in weather_lower or "drizzle" in weather_lower:
-            recommendations["outerwear"] = "Waterproof jacket or raincoat"
-            recommendations["accessories"] = recommendations.get("accessories", "") + ", umbrella"
-            recommendations["footwear"] = "Waterproof shoes or boots"
-        elif "snow" in weather_lower:
-            recommendations["outerwear"] = "Heavy winter coat with hood"
-            recommendations["footwear"] = "Waterproof winter boots"
-            recommendations["accessories"] = "Warm hat, gloves, and scarf"
-        elif "wind" in weather_lower:
-            recommendations["outerwear"] = "Wind-resistant jacket"
-        
-        # Humidity adjustments
-        if humidity and humidity > 70:
-            recommendations["layers"] = "Breathable, moisture-wicking fabrics"
-            if temperature > 20:
-                recommendations["layers"] += " (avoid heavy materials)"
-        
-        return recommendations
-    
+        with CLOTHING_LATENCY.time():
+            return rule_engine.recommend(temperature, weather_condition, humidity)
+
     @staticmethod
     def get_general_advice(temperature: float, weather_condition: str) -> str:
         """
         Generate general clothing advice based on weather
         """
-        if temperature < 10:
-            advice = "Very cold weather - dress in layers and cover exposed skin. "
-            advice += "Don't forget warm accessories like gloves and a hat."
-        elif 10 <= temperature < 20:
-            advice = "Mild weather - perfect for layering. "
-            advice += "You can adjust as needed throughout the day."
-        elif 20 <= temperature < 25:
-            advice = "Comfortable temperature - light layers work well. "
-            advice += "You might want a light jacket for air-conditioned spaces."
-        else:
-            advice = "Warm weather - choose breathable fabrics and stay hydrated. "
-            advice += "Light colors can help reflect heat."
-        
-        # Add weather-specific advice
-        weather_lower = weather_condition.lower()
-        if "rain" in weather_lower:
-            advice += " Don't forget waterproof gear and an umbrella!"
-        elif "snow" in weather_lower:
-            advice += " Bundle up and wear waterproof boots for snowy conditions."
-        elif "wind" in weather_lower:
-            advice += " Consider wind-resistant outer layers."
-        elif "sun" in weather_lower or "clear" in weather_lower:
-            if temperature > 20:
-                advice += " Great weather - don't forget sun protection!"
-        
-        return advice
\ No newline at end of file
+        return rule_engine.advise(temperature, weather_condition)
+
+    @staticmethod
+    def get_recommendations_batch(
+        observations: Iterable[Tuple[float, str, Optional[float]]]
+    ) -> List[Tuple[Dict[str, str], str]]:
+        """
+        Generate (recommendations, general advice) for many
+        (temperature, weather_condition, humidity) observations at once
+        """
+        with CLOTHING_LATENCY.time():
+            return rule_engine.evaluate_batch(observations)
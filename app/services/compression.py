@@ -0,0 +1,110 @@
+import functools
+import gzip
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+from app.config.settings import (
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_SIZE,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY
+)
+from app.services.metrics import COMPRESSION_LATENCY
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html")
+
+
+@functools.lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header (honoring q-values),
+    or None when the client accepts neither
+    """
+    preferences = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        preferences[name.strip()] = quality
+
+    wildcard = preferences.get("*", 0.0)
+    candidates = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = max(candidates, key=lambda encoding: preferences.get(encoding, wildcard))
+    return best if preferences.get(best, wildcard) > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with COMPRESSION_LATENCY.time():
+        if encoding == "br":
+            return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+        # mtime=0 keeps the output identical for identical bodies
+        return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing complete (non-streamed) JSON and text
+    responses of at least COMPRESSION_MIN_SIZE bytes with brotli or gzip,
+    as negotiated via Accept-Encoding. Streamed responses such as SSE pass
+    through untouched so every event is flushed immediately.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether the response is streamed
+                start_message = message
+                return
+            if message["type"] == "http.response.body" and start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=list(start["headers"]))
+                body = message.get("body", b"")
+                if headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers:
+                    headers.add_vary_header("Accept-Encoding")
+                    if not message.get("more_body", False) and len(body) >= self.minimum_size:
+                        body = compress(body, encoding)
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(body))
+                        etag = headers.get("etag")
+                        if etag and not etag.startswith("W/"):
+                            # The encoded bytes differ from the identity representation
+                            headers["ETag"] = f"W/{etag}"
+                        message = {**message, "body": body}
+                    start = {**start, "headers": headers.raw}
+                await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,295 @@
+import httpx
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+
+from app.config.settings import (
+    FORECAST_PROVIDER,
+    FORECAST_BASE_URL,
+    FORECAST_FIXTURE_FILE,
+    FORECAST_HOURS,
+    FORECAST_CACHE_TTL,
+    FORECAST_CACHE_MAX_SIZE
+)
+from app.models.schemas import ForecastSlot, ForecastResponse
+from app.services.cache import TTLCache, MISSING
+from app.services.clothing_service import ClothingService
+from app.services.http_client import HTTPClient
+from app.services.metrics import register_cache
+from app.services.resilience import CircuitOpenError
+from app.services.singleflight import SingleFlight
+from app.services.weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+# WMO weather interpretation codes used by Open-Meteo
+WMO_CONDITIONS = {
+    0: "Clear", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Fog",
+    51: "Light drizzle", 53: "Drizzle", 55: "Heavy drizzle", 56: "Freezing drizzle", 57: "Freezing drizzle",
+    61: "Light rain", 63: "Rain", 65: "Heavy rain", 66: "Freezing rain", 67: "Freezing rain",
+    71: "Light snow", 73: "Snow", 75: "Heavy snow", 77: "Snow grains",
+    80: "Rain showers", 81: "Rain showers", 82: "Heavy rain showers",
+    85: "Snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with hail", 99: "Thunderstorm with hail"
+}
+
+SLOT_TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+class ForecastProvider(ABC):
+    """
+    Source of hourly forecast data. fetch() returns (utc_offset_seconds, slots)
+    where each slot has local "time", "temperature", "weather_condition",
+    "humidity" and "wind_speed".
+    """
+
+    @abstractmethod
+    async def fetch(self, lat: float, lng: float) -> Tuple[int, List[Dict[str, Any]]]:
+        ...
+
+
+class OpenMeteoForecastProvider(ForecastProvider):
+    async def fetch(self, lat: float, lng: float) -> Tuple[int, List[Dict[str, Any]]]:
+        forecast_params = {
+            "latitude": lat,
+            "longitude": lng,
+            "hourly": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m",
+            # Slots start at local midnight today, so ask for one extra day
+            "forecast_days": min(16, FORECAST_HOURS // 24 + 2),
+            "timezone": "auto"
+        }
+
+        try:
+            forecast_response = await HTTPClient.get(FORECAST_BASE_URL, params=forecast_params)
+
+            if forecast_response.status_code != 200:
+                raise HTTPException(
+                    status_code=forecast_response.status_code,
+                    detail=f"Forecast API error: {forecast_response.text}"
+                )
+
+            forecast_data = forecast_response.json()
+
+        except httpx.TimeoutException:
+            raise HTTPException(status_code=408, detail="Forecast request timeout - please try again")
+        except httpx.TransportError:
+            raise HTTPException(status_code=503, detail="Unable to connect to forecast API")
+        except CircuitOpenError:
+            raise HTTPException(status_code=503, detail="Forecast API temporarily unavailable - please try again later")
+
+        hourly = forecast_data.get("hourly", {})
+        slots = [
+            {
+                "time": time,
+                "temperature": temperature,
+                "weather_condition": WMO_CONDITIONS.get(code, "Clear"),
+                "humidity": humidity,
+                "wind_speed": wind_speed
+            }
+            for time, temperature, code, humidity, wind_speed in zip(
+                hourly.get("time", []),
+                hourly.get("temperature_2m", []),
+                hourly.get("weather_code", []),
+                hourly.get("relative_humidity_2m", []),
+                hourly.get("wind_speed_10m", [])
+            )
+            if temperature is not None
+        ]
+        return forecast_data.get("utc_offset_seconds", 0), slots
+
+
+class FixtureForecastProvider(ForecastProvider):
+    """
+    Local stand-in that repeats a 24-hour profile from FORECAST_FIXTURE_FILE
+    """
+
+    def __init__(self, path: str):
+        with open(path, encoding="utf-8") as f:
+            fixture = json.load(f)
+        self.utc_offset_seconds = fixture.get("utc_offset_seconds", 0)
+        self.by_hour = {entry["hour"]: entry for entry in fixture["hourly"]}
+
+    async def fetch(self, lat: float, lng: float) -> Tuple[int, List[Dict[str, Any]]]:
+        now_local = datetime.now(timezone.utc) + timedelta(seconds=self.utc_offset_seconds)
+        start = now_local.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        slots = []
+        for offset in range(FORECAST_HOURS):
+            slot_time = start + timedelta(hours=offset)
+            entry = self.by_hour[slot_time.hour]
+            slots.append({
+                "time": slot_time.strftime(SLOT_TIME_FORMAT),
+                "temperature": entry["temperature"],
+                "weather_condition": entry["weather_condition"],
+                "humidity": entry.get("humidity"),
+                "wind_speed": entry.get("wind_speed")
+            })
+        return self.utc_offset_seconds, slots
+
+
+def create_forecast_provider(name: str) -> ForecastProvider:
+    if name == "open-meteo":
+        return OpenMeteoForecastProvider()
+    if name == "fixture":
+        return FixtureForecastProvider(FORECAST_FIXTURE_FILE)
+    raise ValueError(f"Unknown FORECAST_PROVIDER '{name}' (expected 'open-meteo' or 'fixture')")
+
+
+forecast_provider = create_forecast_provider(FORECAST_PROVIDER)
+
+# Grid cell -> (utc_offset_seconds, precomputed slots)
+forecast_cache = TTLCache(max_size=FORECAST_CACHE_MAX_SIZE, default_ttl=FORECAST_CACHE_TTL)
+forecast_flight = SingleFlight()
+register_cache("forecast", forecast_cache)
+
+
+class ForecastService:
+    @staticmethod
+    async def get_forecast_table(lat: float, lng: float) -> Tuple[int, List[ForecastSlot]]:
+        """
+        Get the hourly forecast for the grid cell containing (lat, lng), with
+        clothing recommendations precomputed for every slot
+        """
+        cell = WeatherService.grid_cell(lat, lng)
+        cached = forecast_cache.get(cell)
+        if cached is not MISSING:
+            return cached
+        return await ForecastService.refresh_forecast_table(lat, lng)
+
+    @staticmethod
+    def forecast_ttl_remaining(lat: float, lng: float) -> Optional[float]:
+        """
+        Seconds until the cached forecast table for (lat, lng) expires, or None
+        """
+        return forecast_cache.remaining_ttl(WeatherService.grid_cell(lat, lng))
+
+    @staticmethod
+    async def refresh_forecast_table(lat: float, lng: float) -> Tuple[int, List[ForecastSlot]]:
+        """
+        Fetch the forecast for the grid cell containing (lat, lng) and
+        precompute its clothing recommendations, replacing any cached table
+        """
+        cell = WeatherService.grid_cell(lat, lng)
+
+        async def fetch_and_precompute() -> Tuple[int, List[ForecastSlot]]:
+            utc_offset_seconds, raw_slots = await forecast_provider.fetch(lat, lng)
+            evaluated = ClothingService.get_recommendations_batch(
+                (slot["temperature"], slot["weather_condition"], slot["humidity"]) for slot in raw_slots
+            )
+            slots = [
+                ForecastSlot(**slot, recommendations=recommendations, general_advice=advice)
+                for slot, (recommendations, advice) in zip(raw_slots, evaluated)
+            ]
+            logger.info(f"Precomputed {len(slots)} forecast slots for cell {cell}")
+            table = (utc_offset_seconds, slots)
+            forecast_cache.set(cell, table)
+            return table
+
+        return await forecast_flight.do(cell, fetch_and_precompute)
+
+    @staticmethod
+    async def get_forecast(location: str, hours: int = FORECAST_HOURS) -> ForecastResponse:
+        """
+        Get upcoming forecast slots (from the current local hour) for a location
+        """
+        lat, lng, formatted_location = await WeatherService.get_coordinates(location)
+        utc_offset_seconds, slots = await ForecastService.get_forecast_table(lat, lng)
+
+        current_hour = ForecastService.local_now(utc_offset_seconds).strftime("%Y-%m-%dT%H:00")
+        upcoming = [slot for slot in slots if slot.time >= current_hour][:hours]
+
+        return ForecastResponse(
+            location=formatted_location,
+            utc_offset_seconds=utc_offset_seconds,
+            slots=upcoming
+        )
+
+    @staticmethod
+    async def find_slot_for_question(location: str, question: str) -> Optional[Tuple[str, ForecastSlot]]:
+        """
+        If the question asks about a future time ("tomorrow at 8am", "in 3 hours"),
+        return (formatted_location, forecast slot) for that time, otherwise None.
+        Also None when the forecast is unavailable, so the caller answers from
+        current weather instead of failing.
+        """
+        if not ForecastService.mentions_future_time(question):
+            return None
+
+        lat, lng, formatted_location = await WeatherService.get_coordinates(location)
+        try:
+            utc_offset_seconds, slots = await ForecastService.get_forecast_table(lat, lng)
+        except (HTTPException, CircuitOpenError, ValueError) as e:
+            # ValueError: a forecast payload that is not valid JSON
+            logger.warning(f"Forecast unavailable for {formatted_location}, using current weather: {str(getattr(e, 'detail', e))}")
+            return None
+
+        target = ForecastService.parse_target_time(question, ForecastService.local_now(utc_offset_seconds))
+        if target is None:
+            return None
+
+        target_hour = target.strftime("%Y-%m-%dT%H")
+        for slot in slots:
+            if slot.time.startswith(target_hour):
+                return formatted_location, slot
+        return None
+
+    @staticmethod
+    def local_now(utc_offset_seconds: int) -> datetime:
+        return (datetime.now(timezone.utc) + timedelta(seconds=utc_offset_seconds)).replace(tzinfo=None)
+
+    @staticmethod
+    def mentions_future_time(question: str) -> bool:
+        return bool(re.search(
+            r"\b(tomorrow|tonight|this (morning|afternoon|evening)|in \d+ hours?|\d{1,2}\s*(am|pm)|at \d{1,2}:\d{2})\b",
+            question.lower()
+        ))
+
+    @staticmethod
+    def parse_target_time(question: str, now_local: datetime) -> Optional[datetime]:
+        """
+        Resolve a time reference in question against the local time at the location.
+        Times that already passed today mean tomorrow ("at 8am" asked at 10am),
+        except for "tonight" and "this morning/afternoon/evening", which only
+        mean today: once passed they resolve to None (answer from current weather).
+        """
+        text = question.lower()
+
+        in_hours = re.search(r"\bin (\d+) hours?\b", text)
+        if in_hours:
+            return now_local + timedelta(hours=int(in_hours.group(1)))
+
+        day = now_local.date()
+        today_only = False
+        if "tomorrow" in text:
+            day = day + timedelta(days=1)
+        else:
+            today_only = bool(re.search(r"\b(tonight|this (morning|afternoon|evening))\b", text))
+
+        hour = None
+        twelve_hour = re.search(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b", text)
+        twenty_four_hour = re.search(r"\bat (\d{1,2}):(\d{2})\b", text)
+        if twelve_hour:
+            hour = int(twelve_hour.group(1)) % 12 + (12 if twelve_hour.group(3) == "pm" else 0)
+        elif twenty_four_hour:
+            hour = int(twenty_four_hour.group(1))
+        elif "tonight" in text or "evening" in text:
+            hour = 20
+        elif "afternoon" in text:
+            hour = 15
+        elif "morning" in text or "tomorrow" in text:
+            hour = 9
+
+        if hour is None or hour > 23:
+            return None
+
+        target = datetime(day.year, day.month, day.day, hour)
+        if target < now_local.replace(minute=0, second=0, microsecond=0):
+            if today_only:
+                return None
+            # "at 8am" after 8am means the next day
+            target += timedelta(days=1)
+        return target
@@ -0,0 +1,318 @@
+import difflib
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# GeoNames "geoname" table columns (tab separated, see http://download.geonames.org/export/dump/)
+NAME_COLUMN = 1
+ASCII_NAME_COLUMN = 2
+ALTERNATE_NAMES_COLUMN = 3
+LATITUDE_COLUMN = 4
+LONGITUDE_COLUMN = 5
+COUNTRY_CODE_COLUMN = 8
+POPULATION_COLUMN = 14
+
+MIN_PREFIX_LENGTH = 4
+FUZZY_CUTOFF = 0.85
+
+# Index file header: magic, source size, source mtime (ns), min population,
+# place count, name count, size of the name blob. Native byte order: the
+# index is a per-host cache, rebuilt whenever the header does not match.
+INDEX_MAGIC = b"GAZIDX02"
+INDEX_HEADER = struct.Struct("=8s6q")
+
+
+def normalize_place_name(name: str) -> str:
+    """
+    Normalize a place name for matching ("  São  Paulo " -> "sao paulo")
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+
+def encode_country_code(code: str) -> int:
+    """
+    Pack a two-letter country code into 16 bits ("FR" -> 0x6672); 0 when it
+    is not two ASCII letters
+    """
+    code = code.strip().lower()
+    if len(code) != 2 or not code.isascii() or not code.isalpha():
+        return 0
+    return ord(code[0]) << 8 | ord(code[1])
+
+
+def default_index_path(path: str, min_population: int) -> str:
+    """
+    Per-host location of the index for a source file (shared by all workers)
+    """
+    identity = f"{os.path.abspath(path)}:{min_population}".encode("utf-8")
+    digest = hashlib.blake2b(identity, digest_size=8).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"gazetteer-{digest}.idx")
+
+
+def build_index(path: str, index_path: str, min_population: int = 0) -> None:
+    """
+    Parse a GeoNames-style file into an index file: per-place record offsets,
+    coordinates, populations and country codes, then every normalized name (UTF-8, sorted
+    bytewise) as start offsets into a name blob plus the record it belongs to.
+    Written to a temporary file and renamed into place.
+    """
+    stat = os.stat(path)
+    offsets = array("q")
+    latitudes = array("d")
+    longitudes = array("d")
+    populations = array("q")
+    country_codes = array("H")
+    entries: List[Tuple[bytes, int]] = []
+
+    with open(path, "rb") as source:
+        offset = 0
+        for line in source:
+            line_offset = offset
+            offset += len(line)
+            columns = line.decode("utf-8", errors="replace").rstrip("\n").split("\t")
+            if len(columns) <= POPULATION_COLUMN:
+                continue
+            population = int(columns[POPULATION_COLUMN] or 0)
+            if population < min_population:
+                continue
+
+            record = len(offsets)
+            offsets.append(line_offset)
+            latitudes.append(float(columns[LATITUDE_COLUMN]))
+            longitudes.append(float(columns[LONGITUDE_COLUMN]))
+            populations.append(population)
+            country_codes.append(encode_country_code(columns[COUNTRY_CODE_COLUMN]))
+
+            names = {columns[NAME_COLUMN], columns[ASCII_NAME_COLUMN]}
+            names.update(alias for alias in columns[ALTERNATE_NAMES_COLUMN].split(",") if alias)
+            for name in names:
+                key = normalize_place_name(name)
+                if key:
+                    entries.append((key.encode("utf-8"), record))
+
+    # UTF-8 byte order is code point order, so lookups can compare raw bytes
+    entries.sort()
+    name_starts = array("q", [0])
+    records = array("q")
+    for key, record in entries:
+        name_starts.append(name_starts[-1] + len(key))
+        records.append(record)
+
+    directory = os.path.dirname(os.path.abspath(index_path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as index:
+            index.write(INDEX_HEADER.pack(
+                INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, min_population,
+                len(offsets), len(records), name_starts[-1]
+            ))
+            # 8-byte arrays first so every view stays aligned; the 2-byte codes and the blob follow
+            for values in (offsets, latitudes, longitudes, populations, name_starts, records, country_codes):
+                values.tofile(index)
+            for key, _ in entries:
+                index.write(key)
+        os.replace(temporary_path, index_path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    logger.info(f"Built gazetteer index {index_path}: {len(offsets)} places, {len(records)} names")
+
+
+class _SortedNames:
+    """
+    Read-only sequence view of the sorted names in an index, as bytes, so the
+    bisect functions can binary-search it in place
+    """
+
+    def __init__(self, starts: memoryview, blob: memoryview):
+        self._starts = starts
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._starts) - 1
+
+    def __getitem__(self, position: int) -> bytes:
+        return bytes(self._blob[self._starts[position]:self._starts[position + 1]])
+
+
+class Gazetteer:
+    """
+    Offline place-name index built from a GeoNames-style file.
+    The sorted name index is built once per host into index_path and
+    memory-mapped together with the source file, so workers share it through
+    the page cache instead of each holding the names as Python objects.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        min_population: int = 0,
+        index_path: Optional[str] = None,
+        fuzzy_max_candidates: int = 5000
+    ):
+        self.path = path
+        self.index_path = index_path or default_index_path(path, min_population)
+        self.fuzzy_max_candidates = fuzzy_max_candidates
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # One worker builds a missing or outdated index; the others wait for it
+        with open(self.index_path + ".lock", "wb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not self._index_matches(min_population):
+                build_index(path, self.index_path, min_population)
+        self._index_file = open(self.index_path, "rb")
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        _, _, _, _, places, names, blob_size = INDEX_HEADER.unpack_from(self._index)
+        self._views: List[memoryview] = []
+        position = INDEX_HEADER.size
+        self._offsets, position = self._view(position, places, "q")
+        self._latitudes, position = self._view(position, places, "d")
+        self._longitudes, position = self._view(position, places, "d")
+        self._populations, position = self._view(position, places, "q")
+        name_starts, position = self._view(position, names + 1, "q")
+        self._records, position = self._view(position, names, "q")
+        self._country_codes, position = self._view(position, places, "H")
+        blob, _ = self._view(position, blob_size, "B")
+        self._keys = _SortedNames(name_starts, blob)
+        logger.info(f"Loaded gazetteer from {path}: {places} places, {names} names")
+
+    def _index_matches(self, min_population: int) -> bool:
+        try:
+            with open(self.index_path, "rb") as index:
+                header = index.read(INDEX_HEADER.size)
+        except FileNotFoundError:
+            return False
+        if len(header) != INDEX_HEADER.size:
+            return False
+        magic, size, mtime_ns, index_min_population = INDEX_HEADER.unpack(header)[:4]
+        stat = os.fstat(self._file.fileno())
+        return (magic, size, mtime_ns, index_min_population) == (
+            INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, min_population
+        )
+
+    def _view(self, position: int, count: int, typecode: str) -> Tuple[memoryview, int]:
+        end = position + count * struct.calcsize(typecode)
+        view = memoryview(self._index)[position:end].cast(typecode)
+        self._views.append(view)
+        return view, end
+
+    def close(self) -> None:
+        # Views into the map must be released before it can be closed
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._index.close()
+        self._index_file.close()
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _read_columns(self, record: int) -> List[str]:
+        start = self._offsets[record]
+        end = self._mmap.find(b"\n", start)
+        line = self._mmap[start:end if end != -1 else len(self._mmap)]
+        return line.decode("utf-8", errors="replace").split("\t")
+
+    def _best(self, records: List[int], country_code: Optional[str]) -> Optional[int]:
+        if country_code:
+            # Filtered on the index alone: a short prefix can match tens of thousands of places
+            code = encode_country_code(country_code)
+            records = [record for record in records if self._country_codes[record] == code]
+        if not records:
+            return None
+        return max(records, key=lambda record: self._populations[record])
+
+    def _exact(self, key: bytes) -> List[int]:
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key, lo=start)
+        return list(self._records[start:end])
+
+    def _prefix_range(self, key: bytes) -> Tuple[int, int]:
+        # 0xff never occurs in UTF-8, so it sorts after every name with this prefix
+        start = bisect_left(self._keys, key)
+        return start, bisect_left(self._keys, key + b"\xff", lo=start)
+
+    def _prefix(self, key: bytes) -> List[int]:
+        start, end = self._prefix_range(key)
+        return list(self._records[start:end])
+
+    def _fuzzy(self, name: str) -> List[int]:
+        # Compare against names sharing the first two characters, narrowed to
+        # the neighbours of name when that is more than fuzzy_max_candidates
+        start, end = self._prefix_range(name[:2].encode("utf-8"))
+        if end - start > self.fuzzy_max_candidates:
+            middle = bisect_left(self._keys, name.encode("utf-8"), lo=start, hi=end)
+            start = max(start, middle - self.fuzzy_max_candidates // 2)
+            end = min(end, start + self.fuzzy_max_candidates)
+        candidates = [self._keys[position].decode("utf-8") for position in range(start, end)]
+        matches = difflib.get_close_matches(name, candidates, n=1, cutoff=FUZZY_CUTOFF)
+        return self._exact(matches[0].encode("utf-8")) if matches else []
+
+    @staticmethod
+    def _parse(location: str) -> Optional[Tuple[str, Optional[str]]]:
+        parts = [part.strip() for part in normalize_place_name(location).split(",")]
+        name = parts[0]
+        country_code = None
+        if len(parts) == 2 and len(parts[1]) == 2:
+            country_code = parts[1]
+        elif len(parts) > 1:
+            # Qualifiers we cannot verify offline ("Paris, Texas") go to OpenCage
+            return None
+        if not name:
+            return None
+        return name, country_code
+
+    def _result(self, record: Optional[int]) -> Optional[Tuple[float, float, str]]:
+        if record is None:
+            return None
+        columns = self._read_columns(record)
+        formatted_location = f"{columns[NAME_COLUMN]}, {columns[COUNTRY_CODE_COLUMN]}"
+        return self._latitudes[record], self._longitudes[record], formatted_location
+
+    def lookup(self, location: str, fuzzy: bool = True) -> Optional[Tuple[float, float, str]]:
+        """
+        Resolve a location to (latitude, longitude, formatted_location).
+        "Name" and "Name, CC" (ISO country code) are supported; exact matches
+        win over prefix and then fuzzy matches, ties go to the most populous place.
+        Returns None on a miss so the caller can fall back to OpenCage.
+        """
+        parsed = self._parse(location)
+        if parsed is None:
+            return None
+        name, country_code = parsed
+
+        key = name.encode("utf-8")
+        record = self._best(self._exact(key), country_code)
+        if record is None and len(name) >= MIN_PREFIX_LENGTH:
+            record = self._best(self._prefix(key), country_code)
+        if record is None and fuzzy:
+            return self.lookup_fuzzy(location)
+        return self._result(record)
+
+    def lookup_fuzzy(self, location: str) -> Optional[Tuple[float, float, str]]:
+        """
+        Only the fuzzy pass of lookup(). It is CPU-bound (difflib over up to
+        fuzzy_max_candidates names), so async callers run it in a thread.
+        """
+        parsed = self._parse(location)
+        if parsed is None or len(parsed[0]) < MIN_PREFIX_LENGTH:
+            return None
+        name, country_code = parsed
+        return self._result(self._best(self._fuzzy(name), country_code))
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.services.metrics import GEMINI_DISPATCH, GEMINI_QUEUE_DEPTH
+from app.services.rate_limit import RateLimitExceeded
+from app.services.resilience import CircuitBreaker
+
+
+class GeminiDispatcher:
+    """
+    Admission control for Gemini generations: at most max_concurrency run at
+    once and at most queue_size wait for a slot; beyond that new work is shed
+    with RateLimitExceeded. Each caller waits until its own deadline and then
+    gives up (raising asyncio.TimeoutError) so it can fall back. Work that
+    already holds a slot keeps running for whoever joined it and for the
+    response cache, but only for `grace` seconds past its deadline; then it is
+    cancelled, its slot freed and the timeout reported to `breaker`. Jobs with
+    the same key (compatible prompts) share one generation, whether it is
+    still queued or already running.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_size: int,
+        grace: float,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.grace = grace
+        self.breaker = breaker
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._jobs: Dict[Hashable, asyncio.Task] = {}
+
+    @asynccontextmanager
+    async def slot(self, deadline: float) -> AsyncIterator[None]:
+        """
+        Hold a generation slot; waiting for it counts against the queue and
+        ends with asyncio.TimeoutError at deadline (a time.monotonic() value)
+        """
+        if not self._slots.locked():
+            # A slot is free: take it without queueing (does not suspend)
+            await self._slots.acquire()
+        elif self.waiting >= self.queue_size:
+            GEMINI_DISPATCH.labels("rejected").inc()
+            raise RateLimitExceeded("gemini queue", max(1.0, deadline - time.monotonic()))
+        else:
+            self.waiting += 1
+            GEMINI_QUEUE_DEPTH.set(self.waiting)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                GEMINI_DISPATCH.labels("expired").inc()
+                raise
+            finally:
+                self.waiting -= 1
+                GEMINI_QUEUE_DEPTH.set(self.waiting)
+
+        GEMINI_DISPATCH.labels("dispatched").inc()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        """
+        Await func() under the dispatcher, joining a queued or running job
+        with the same key. Raises asyncio.TimeoutError after timeout seconds
+        and RateLimitExceeded when the queue is full.
+        """
+        task = self._jobs.get(key)
+        if task is None:
+            deadline = time.monotonic() + timeout
+            task = asyncio.ensure_future(self._execute(func, deadline))
+            self._jobs[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            GEMINI_DISPATCH.labels("coalesced").inc()
+
+        try:
+            # Shield so a caller that gives up does not cancel work others share
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            GEMINI_DISPATCH.labels("deadline_missed").inc()
+            raise
+
+    async def _execute(self, func: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        async with self.slot(deadline):
+            try:
+                # A generation that never returns must not keep its slot forever
+                return await asyncio.wait_for(func(), max(deadline - time.monotonic(), 0.0) + self.grace)
+            except asyncio.TimeoutError:
+                GEMINI_DISPATCH.labels("timed_out").inc()
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._jobs.get(key) is task:
+            del self._jobs[key]
+        # Mark the exception as retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
@@ -1,121 +1,454 @@
-import google.generativeai as genai
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Optional
+import re
+import time
+from typing import AsyncIterator, Optional, Tuple
 
-from app.config.settings import GEMINI_API_KEY
+from google.api_core import exceptions as google_exceptions
+
+from app.config.settings import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_CACHE_MAX_SIZE,
+    GEMINI_CACHE_TTL,
+    GEMINI_CACHE_TEMPERATURE_BUCKET,
+    GEMINI_CACHE_FILE,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_QUEUE_SIZE,
+    GEMINI_DEADLINE,
+    GEMINI_GENERATION_GRACE
+)
 from app.models.schemas import WeatherResponse, ClothingRecommendation
+from app.services.cache import MISSING
+from app.services.clothing_service import ClothingService
+from app.services.gemini_dispatch import GeminiDispatcher
+from app.services.metrics import GEMINI_LATENCY, UPSTREAM_RESPONSES, register_cache
+from app.services.rate_limit import RateLimitExceeded, quota_manager
+from app.services.resilience import Upstream
+from app.services.shared_cache import TieredCache
+from app.services.tracing import current_span, start_span
 
 logger = logging.getLogger(__name__)
 
+# Canonical (location, temperature band, condition, recommendations, question) -> completion
+response_cache = TieredCache("gemini", max_size=GEMINI_CACHE_MAX_SIZE, default_ttl=GEMINI_CACHE_TTL)
+register_cache("gemini", response_cache)
+
+# Only transient failures are retried and counted by the breaker; permanent
+# ones (blocked prompts, 400s, permission errors) fail the call straight away.
+# ResourceExhausted (429) is raised as RateLimitExceeded: counted, not retried.
+GEMINI_TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    asyncio.TimeoutError
+)
+gemini_upstream = Upstream("gemini", retry_on=GEMINI_TRANSIENT_ERRORS, reject_on=(RateLimitExceeded,))
+
+# Gemini quotas are per minute and its 429s carry no Retry-After
+GEMINI_QUOTA_RETRY_AFTER = 60.0
+# Concurrency, queueing and deadlines for every generation (streams included)
+gemini_dispatcher = GeminiDispatcher(
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_QUEUE_SIZE,
+    GEMINI_GENERATION_GRACE,
+    gemini_upstream.breaker
+)
+
+# Created on first use by GeminiService.get_model()
+_model = None
+
+
+class GeminiStreamError(Exception):
+    """
+    Raised when a stream fails after some of its text was already sent, so
+    the caller can tell the client the answer is incomplete
+    """
+
 
 class GeminiService:
     @staticmethod
-    async def get_gemini_response(
+    def is_configured() -> bool:
+        return bool(GEMINI_API_KEY) and GEMINI_API_KEY != "YOUR_GEMINI_API_KEY_HERE"
+
+    @staticmethod
+    def get_model():
+        """
+        Import and configure the Gemini SDK on first use and return the shared model.
+        Raises RuntimeError when GEMINI_API_KEY is not set.
+        """
+        global _model
+        if _model is None:
+            if not GeminiService.is_configured():
+                raise RuntimeError("GEMINI_API_KEY environment variable is not set")
+            import google.generativeai as genai
+
+            genai.configure(api_key=GEMINI_API_KEY)
+            _model = genai.GenerativeModel(GEMINI_MODEL)
+            logger.info(f"Gemini model {GEMINI_MODEL} initialized")
+        return _model
+
+    @staticmethod
+    def response_cache_key(
+        weather_data: WeatherResponse,
+        clothing_recommendation: ClothingRecommendation,
+        user_question: Optional[str] = None
+    ) -> str:
+        """
+        Build the semantic cache key for a weather completion. Prompts that only
+        differ in exact temperature (within a band), casing or punctuation share a key.
+        """
+        question = re.sub(r"[^\w\s]", "", (user_question or "").lower())
+        canonical = {
+            "location": " ".join(weather_data.location.lower().split()),
+            "temperature": round(weather_data.temperature / GEMINI_CACHE_TEMPERATURE_BUCKET),
+            "condition": weather_data.weather_condition.strip().lower(),
+            "recommendations": clothing_recommendation.recommendations,
+            "question": " ".join(question.split())
+        }
+        encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def load_response_cache() -> None:
+        """
+        Restore persisted completions (called at startup when GEMINI_CACHE_FILE is set)
+        """
+        if GEMINI_CACHE_FILE:
+            loaded = response_cache.l1.load(GEMINI_CACHE_FILE)
+            logger.info(f"Loaded {loaded} cached Gemini responses from {GEMINI_CACHE_FILE}")
+
+    @staticmethod
+    def save_response_cache() -> None:
+        """
+        Persist completions (called at shutdown when GEMINI_CACHE_FILE is set)
+        """
+        if GEMINI_CACHE_FILE:
+            try:
+                response_cache.l1.save(GEMINI_CACHE_FILE)
+                logger.info(f"Saved {len(response_cache)} cached Gemini responses to {GEMINI_CACHE_FILE}")
+            except OSError as e:
+                logger.error(f"Unable to save Gemini response cache: {str(e)}")
+
+    @staticmethod
+    async def generate_text(prompt: str) -> Optional[str]:
+        """
+        Generate a completion for prompt. Callers go through gemini_dispatcher,
+        which coalesces identical concurrent prompts; no shield is used here so
+        the dispatcher's time limit really cancels the upstream call.
+        """
+        async def generate() -> Optional[str]:
+            model = GeminiService.get_model()
+            try:
+                response = await model.generate_content_async(prompt)
+            except google_exceptions.ResourceExhausted:
+                UPSTREAM_RESPONSES.labels("gemini", "429").inc()
+                raise RateLimitExceeded("gemini quota", GEMINI_QUOTA_RETRY_AFTER)
+            except Exception:
+                UPSTREAM_RESPONSES.labels("gemini", "error").inc()
+                raise
+            UPSTREAM_RESPONSES.labels("gemini", "ok").inc()
+            GeminiService._record_usage(response)
+            # A blocked answer has no parts, and reading .text would raise ValueError
+            if response and response.parts and response.text:
+                return response.text.strip()
+            return None
+
+        async def generate_within_quota() -> Optional[str]:
+            # Quota is taken once per call (outside the retry loop) so a quota
+            # rejection is never retried or counted against the breaker
+            await quota_manager.acquire_upstream("gemini")
+            return await gemini_upstream.call(generate)
+
+        with GEMINI_LATENCY.time(), start_span("gemini.generate", {"gemini.prompt_chars": len(prompt)}) as span:
+            response_text = await generate_within_quota()
+            span.set_attribute("gemini.response_chars", len(response_text or ""))
+            return response_text
+
+    @staticmethod
+    def _record_usage(response) -> None:
+        # usage_metadata is only reported by newer SDK/API versions
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            span = current_span()
+            span.set_attribute("gemini.prompt_tokens", getattr(usage, "prompt_token_count", 0))
+            span.set_attribute("gemini.completion_tokens", getattr(usage, "candidates_token_count", 0))
+
+    @staticmethod
+    async def stream_text(prompt: str) -> AsyncIterator[str]:
+        """
+        Yield completion text chunks for prompt as Gemini produces them
+        """
+        # Streams are not retried or hedged once tokens flow, but still take a
+        # dispatcher slot (waiting at most GEMINI_DEADLINE) and honor the breaker and quota
+        async with gemini_dispatcher.slot(time.monotonic() + GEMINI_DEADLINE):
+            await quota_manager.acquire_upstream("gemini")
+            gemini_upstream.breaker.before_call()
+            started = time.perf_counter()
+            with start_span("gemini.stream", {"gemini.prompt_chars": len(prompt)}) as span:
+                streamed_chars = 0
+                # A stalled stream is abandoned after this long without a chunk
+                idle_limit = GEMINI_DEADLINE + GEMINI_GENERATION_GRACE
+                try:
+                    model = GeminiService.get_model()
+                    response = await asyncio.wait_for(model.generate_content_async(prompt, stream=True), idle_limit)
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), idle_limit)
+                        except StopAsyncIteration:
+                            break
+                        if chunk.parts and chunk.text:
+                            streamed_chars += len(chunk.text)
+                            yield chunk.text
+                except google_exceptions.ResourceExhausted:
+                    gemini_upstream.breaker.record_failure()
+                    UPSTREAM_RESPONSES.labels("gemini", "429").inc()
+                    raise RateLimitExceeded("gemini quota", GEMINI_QUOTA_RETRY_AFTER)
+                except Exception as e:
+                    if isinstance(e, GEMINI_TRANSIENT_ERRORS):
+                        gemini_upstream.breaker.record_failure()
+                    UPSTREAM_RESPONSES.labels("gemini", "error").inc()
+                    raise
+                span.set_attribute("gemini.response_chars", streamed_chars)
+            gemini_upstream.breaker.record_success()
+            UPSTREAM_RESPONSES.labels("gemini", "ok").inc()
+            GEMINI_LATENCY.observe(time.perf_counter() - started)
+
+    @staticmethod
+    def build_weather_prompt(
         weather_data: WeatherResponse,
         clothing_recommendation: ClothingRecommendation,
         user_question: Optional[str] = None
     ) -> str:
         """
-        Get enhanced response from Gemini AI based on weather and clothing data
+        Build the clothing assistant prompt from weather and clothing data
+        """
+        # Prepare the prompt with explicit temperature formatting
+        temperature = weather_data.temperature
+        humidity = weather_data.humidity if weather_data.humidity is not None else "N/A"
+        wind_speed = weather_data.wind_speed if weather_data.wind_speed is not None else "N/A"
+        
+        prompt = f"""
+        You are a specialized multilanguage that can respond in multiple languages. You are a clothing and fashion assistant focused exclusively on clothing, fashion, and what to wear. You ONLY answer questions related to:
+        - Clothing recommendations
+        - Fashion advice
+        - What to wear in different weather conditions
+        - Outfit suggestions
+        - Clothing materials and fabrics
+        - Seasonal fashion
+        - Dress codes and appropriate attire
+        - Current weather conditions and forecasts
+        - How weather affects clothing choices
+        - Weather-appropriate outfit planning
+        
+        Current Weather Context:
+        - Location: {weather_data.location}
+        - Temperature: {temperature}°C (This is the current temperature: {temperature} degrees Celsius)
+        - Weather Condition: {weather_data.weather_condition}
+        - Humidity: {humidity}%
+        - Wind Speed: {wind_speed} km/h
+        
+        Clothing Recommendations:
+        - Outerwear: {clothing_recommendation.recommendations.get('outerwear', 'N/A')}
+        - Layers: {clothing_recommendation.recommendations.get('layers', 'N/A')}
+        - Bottoms: {clothing_recommendation.recommendations.get('bottoms', 'N/A')}
+        - Footwear: {clothing_recommendation.recommendations.get('footwear', 'N/A')}
+        - Accessories: {clothing_recommendation.recommendations.get('accessories', 'N/A')}
+        
+        General Advice: {clothing_recommendation.general_advice}
+        
+        IMPORTANT: If the user asks about anything NOT related to clothing, fashion, weather conditions, or what to wear, politely redirect them by saying: "I'm a clothing and weather assistant. I can help with questions about weather conditions, what to wear, clothing recommendations, and fashion advice. Please ask me about weather, clothing or fashion!"
+        """
+        
+        if user_question:
+            prompt += f"\n\nUser's specific question: {user_question}"
+            prompt += "\n\nFor clothing-related questions, provide helpful, conversational responses that incorporate the weather data and clothing recommendations."
+        else:
+            prompt += "\n\nProvide a friendly, conversational response about the clothing recommendations based on the weather conditions. Make it personal and engaging."
+        
+        prompt += "\n\nKeep your response concise but helpful (max 200 words)."
+        
+        return prompt
+
+    @staticmethod
+    def build_fallback_response(
+        weather_data: WeatherResponse,
+        clothing_recommendation: ClothingRecommendation
+    ) -> str:
+        """
+        Rule-based answer used when Gemini cannot answer in time
+        """
+        outfit = "; ".join(
+            f"{item.capitalize()}: {advice}" for item, advice in clothing_recommendation.recommendations.items()
+        )
+        return (
+            f"Our AI assistant is busy right now, so here are the standard recommendations for "
+            f"{weather_data.location} ({weather_data.temperature}°C, {weather_data.weather_condition.lower()}). "
+            f"{outfit}. {ClothingService.get_general_advice(weather_data.temperature, weather_data.weather_condition)}"
+        )
+
+    @staticmethod
+    def build_natural_prompt(question: str) -> str:
+        """
+        Build the open conversation prompt for a question
+        """
+        # Create a more open prompt for natural conversation
+        prompt = f"""
+        You are a helpful and friendly AI assistant. You can discuss a wide variety of topics and provide helpful information, advice, and engage in natural conversation.
+        
+        Please respond to the following question or message in a helpful, informative, and conversational manner:
+        
+        Question: {question}
+        
+        Please provide a natural, helpful response.
+        """
+        return prompt
+
+    @staticmethod
+    async def get_gemini_response(
+        weather_data: WeatherResponse,
+        clothing_recommendation: ClothingRecommendation,
+        user_question: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """
+        Get enhanced response from Gemini AI based on weather and clothing data.
+        Returns (text, is_fallback); is_fallback is True when the text is a
+        stand-in (rule-based advice or an error message) rather than an answer
+        from Gemini.
         """
         try:
-            if GEMINI_API_KEY == "YOUR_GEMINI_API_KEY_HERE" or not GEMINI_API_KEY:
-                return "Gemini AI is not configured. Please set your GEMINI_API_KEY environment variable for enhanced responses."
+            if not GeminiService.is_configured():
+                return "Gemini AI is not configured. Please set your GEMINI_API_KEY environment variable for enhanced responses.", False
             
             # Log temperature data for debugging
             logger.info(f"Gemini Service - Temperature data: {weather_data.temperature}°C (type: {type(weather_data.temperature)})")
             logger.info(f"Gemini Service - Weather condition: {weather_data.weather_condition}")
             logger.info(f"Gemini Service - Location: {weather_data.location}")
             
-            # Create the model
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            
-            # Prepare the prompt with explicit temperature formatting
-            temperature = weather_data.temperature
-            humidity = weather_data.humidity if weather_data.humidity is not None else "N/A"
-            wind_speed = weather_data.wind_speed if weather_data.wind_speed is not None else "N/A"
+            cache_key = GeminiService.response_cache_key(weather_data, clothing_recommendation, user_question)
+            cached = await response_cache.get(cache_key)
+            current_span().set_attribute("gemini.cache_hit", cached is not MISSING)
+            if cached is not MISSING:
+                return cached, False
             
-            prompt = f"""
-            You are a specialized multilanguage that can respond in multiple languages. You are a clothing and fashion assistant focused exclusively on clothing, fashion, and what to wear. You ONLY answer questions related to:
-            - Clothing recommendations
-            - Fashion advice
-            - What to wear in different weather conditions
-            - Outfit suggestions
-            - Clothing materials and fabrics
-            - Seasonal fashion
-            - Dress codes and appropriate attire
-            - Current weather conditions and forecasts
-            - How weather affects clothing choices
-            - Weather-appropriate outfit planning
-            
-            Current Weather Context:
-            - Location: {weather_data.location}
-            - Temperature: {temperature}°C (This is the current temperature: {temperature} degrees Celsius)
-            - Weather Condition: {weather_data.weather_condition}
-            - Humidity: {humidity}%
-            - Wind Speed: {wind_speed} km/h
-            
-            Clothing Recommendations:
-            - Outerwear: {clothing_recommendation.recommendations.get('outerwear', 'N/A')}
-            - Layers: {clothing_recommendation.recommendations.get('layers', 'N/A')}
-            - Bottoms: {clothing_recommendation.recommendations.get('bottoms', 'N/A')}
-            - Footwear: {clothing_recommendation.recommendations.get('footwear', 'N/A')}
-            - Accessories: {clothing_recommendation.recommendations.get('accessories', 'N/A')}
-            
-            General Advice: {clothing_recommendation.general_advice}
-            
-            IMPORTANT: If the user asks about anything NOT related to clothing, fashion, weather conditions, or what to wear, politely redirect them by saying: "I'm a clothing and weather assistant. I can help with questions about weather conditions, what to wear, clothing recommendations, and fashion advice. Please ask me about weather, clothing or fashion!"
-            """
-            
-            if user_question:
-                prompt += f"\n\nUser's specific question: {user_question}"
-                prompt += "\n\nFor clothing-related questions, provide helpful, conversational responses that incorporate the weather data and clothing recommendations."
-            else:
-                prompt += "\n\nProvide a friendly, conversational response about the clothing recommendations based on the weather conditions. Make it personal and engaging."
+            prompt = GeminiService.build_weather_prompt(weather_data, clothing_recommendation, user_question)
             
-            prompt += "\n\nKeep your response concise but helpful (max 200 words)."
+            async def complete() -> Optional[str]:
+                # Cached here rather than by the caller so a completion that
+                # misses its deadline still serves later requests
+                response_text = await GeminiService.generate_text(prompt)
+                if response_text:
+                    await response_cache.set(cache_key, response_text)
+                return response_text
             
-            # Generate response
-            response = model.generate_content(prompt)
+            # Requests sharing a cache key share one queued or running generation
+            response_text = await gemini_dispatcher.run(cache_key, complete, GEMINI_DEADLINE)
             
-            if response and response.text:
-                return response.text.strip()
+            if response_text:
+                return response_text, False
             else:
-                return "I'm having trouble generating a response right now. Please try again later."
-                
+                return "I'm having trouble generating a response right now. Please try again later.", True
+        
+        except (asyncio.TimeoutError, RateLimitExceeded) as e:
+            logger.warning(f"Gemini unavailable in time, using rule-based advice: {str(getattr(e, 'detail', None) or 'deadline missed')}")
+            return GeminiService.build_fallback_response(weather_data, clothing_recommendation), True
         except Exception as e:
             logger.error(f"Gemini API error: {str(e)}")
-            return f"I'm experiencing some technical difficulties with the AI service. Here's the basic weather info: {weather_data.temperature}°C with {weather_data.weather_condition.lower()} conditions in {weather_data.location}."
+            return f"I'm experiencing some technical difficulties with the AI service. Here's the basic weather info: {weather_data.temperature}°C with {weather_data.weather_condition.lower()} conditions in {weather_data.location}.", True
     
     @staticmethod
     async def get_natural_response(question: str) -> str:
         """
         Get a natural conversation response from Gemini AI without weather restrictions
         """
+        if not GeminiService.is_configured():
+            return "Gemini AI is not configured. Please set your GEMINI_API_KEY environment variable for AI responses."
+        
         try:
-            # Configure Gemini
-            genai.configure(api_key=GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-2.0-flash')
-            
-            # Create a more open prompt for natural conversation
-            prompt = f"""
-            You are a helpful and friendly AI assistant. You can discuss a wide variety of topics and provide helpful information, advice, and engage in natural conversation.
-            
-            Please respond to the following question or message in a helpful, informative, and conversational manner:
-            
-            Question: {question}
-            
-            Please provide a natural, helpful response.
-            """
+            prompt = GeminiService.build_natural_prompt(question)
             
             # Generate response
-            response = model.generate_content(prompt)
+            response_text = await gemini_dispatcher.run(prompt, lambda: GeminiService.generate_text(prompt), GEMINI_DEADLINE)
             
-            if response and response.text:
-                return response.text.strip()
+            if response_text:
+                return response_text
             else:
                 return "I'm sorry, I couldn't generate a response to your question. Could you please try rephrasing it?"
                 
+        except RateLimitExceeded:
+            # Without weather context there is no fallback worth sending; let the client back off
+            raise
         except Exception as e:
             logger.error(f"Error calling Gemini API for natural conversation: {str(e)}")
-            return "I apologize, but I'm having trouble processing your request right now. Please try again later."
\ No newline at end of file
+            return "I apologize, but I'm having trouble processing your request right now. Please try again later."
+    
+    @staticmethod
+    async def stream_gemini_response(
+        weather_data: WeatherResponse,
+        clothing_recommendation: ClothingRecommendation,
+        user_question: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of get_gemini_response, yielding text chunks
+        """
+        if not GeminiService.is_configured():
+            yield "Gemini AI is not configured. Please set your GEMINI_API_KEY environment variable for enhanced responses."
+            return
+        
+        cache_key = GeminiService.response_cache_key(weather_data, clothing_recommendation, user_question)
+        cached = await response_cache.get(cache_key)
+        if cached is not MISSING:
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            prompt = GeminiService.build_weather_prompt(weather_data, clothing_recommendation, user_question)
+            async for text in GeminiService.stream_text(prompt):
+                chunks.append(text)
+                yield text
+        except (asyncio.TimeoutError, RateLimitExceeded) as e:
+            logger.warning(f"Gemini stream unavailable in time, using rule-based advice: {str(getattr(e, 'detail', None) or 'deadline missed')}")
+            if chunks:
+                raise GeminiStreamError("The AI response timed out before it was complete") from e
+            yield GeminiService.build_fallback_response(weather_data, clothing_recommendation)
+            return
+        except Exception as e:
+            logger.error(f"Gemini API streaming error: {e!r}")
+            if chunks:
+                raise GeminiStreamError("The AI service failed before the response was complete") from e
+            yield f"I'm experiencing some technical difficulties with the AI service. Here's the basic weather info: {weather_data.temperature}°C with {weather_data.weather_condition.lower()} conditions in {weather_data.location}."
+            return
+        
+        if chunks:
+            await response_cache.set(cache_key, "".join(chunks).strip())
+        else:
+            yield "I'm having trouble generating a response right now. Please try again later."
+    
+    @staticmethod
+    async def stream_natural_response(question: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of get_natural_response, yielding text chunks
+        """
+        if not GeminiService.is_configured():
+            yield "Gemini AI is not configured. Please set your GEMINI_API_KEY environment variable for AI responses."
+            return
+        
+        streamed = False
+        try:
+            prompt = GeminiService.build_natural_prompt(question)
+            async for text in GeminiService.stream_text(prompt):
+                streamed = True
+                yield text
+        except Exception as e:
+            logger.error(f"Error streaming Gemini API natural conversation: {e!r}")
+            if streamed:
+                raise GeminiStreamError("The AI service failed before the response was complete") from e
+            yield "I apologize, but I'm having trouble processing your request right now. Please try again later."
+            return
+        
+        if not streamed:
+            yield "I'm sorry, I couldn't generate a response to your question. Could you please try rephrasing it?"
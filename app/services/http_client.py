@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config.settings import (
+    HTTP_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONCURRENCY_PER_HOST,
+    UPSTREAM_DEADLINE
+)
+from app.services.metrics import UPSTREAM_RESPONSES
+from app.services.rate_limit import RateLimitExceeded
+from app.services.resilience import Upstream
+from app.services.tracing import start_span
+
+logger = logging.getLogger(__name__)
+
+# Upstream responses that count as failures for retries and circuit breaking
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+# Seconds to back off after a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """
+    Seconds to wait from a Retry-After header (delay in seconds or an HTTP date)
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+class HTTPClient:
+    """
+    Shared async HTTP client used for every upstream API call.
+    Created once at app startup and closed on shutdown.
+    """
+    _client: Optional[httpx.AsyncClient] = None
+    _host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    _upstreams: Dict[str, Upstream] = {}
+
+    @staticmethod
+    def _build_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+
+    @classmethod
+    async def startup(cls) -> None:
+        """
+        Create the pooled client (called from the app lifespan)
+        """
+        if cls._client is None:
+            cls._client = cls._build_client()
+            logger.info(
+                f"HTTP client started (max_connections={HTTP_MAX_CONNECTIONS}, "
+                f"per_host={HTTP_MAX_CONCURRENCY_PER_HOST})"
+            )
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """
+        Close the pooled client and release its connections
+        """
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+            logger.info("HTTP client closed")
+        cls._host_semaphores.clear()
+
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """
+        Return the shared client, creating it lazily when used outside the app lifespan
+        """
+        if cls._client is None:
+            cls._client = cls._build_client()
+        return cls._client
+
+    @classmethod
+    def _get_host_semaphore(cls, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = cls._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(HTTP_MAX_CONCURRENCY_PER_HOST)
+            cls._host_semaphores[host] = semaphore
+        return semaphore
+
+    @classmethod
+    def get_upstream(cls, url: str) -> Upstream:
+        """
+        Return the resilience policy (circuit breaker, retries, hedging) for the host of url
+        """
+        host = urlsplit(url).netloc
+        upstream = cls._upstreams.get(host)
+        if upstream is None:
+            upstream = Upstream(
+                host,
+                retry_on=(httpx.TransportError,),
+                reject_on=(RateLimitExceeded,),
+                deadline=UPSTREAM_DEADLINE,
+                timeout_error=lambda: httpx.TimeoutException(f"{host} did not answer within {UPSTREAM_DEADLINE}s")
+            )
+            cls._upstreams[host] = upstream
+        return upstream
+
+    @classmethod
+    async def get(cls, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        Send a GET request, capping the number of in-flight requests per host.
+        Raises CircuitOpenError without sending anything while the host's breaker is open,
+        and RateLimitExceeded (not retried) when the host answers 429.
+        """
+        semaphore = cls._get_host_semaphore(url)
+        host = urlsplit(url).netloc
+
+        async def send() -> httpx.Response:
+            with start_span("http.get", {"http.host": host}) as span:
+                async with semaphore:
+                    try:
+                        response = await cls.get_client().get(url, params=params)
+                    except httpx.TimeoutException:
+                        UPSTREAM_RESPONSES.labels(host, "timeout").inc()
+                        raise
+                    except httpx.TransportError:
+                        UPSTREAM_RESPONSES.labels(host, "error").inc()
+                        raise
+                UPSTREAM_RESPONSES.labels(host, str(response.status_code)).inc()
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("http.response_bytes", len(response.content))
+                if response.status_code == 429:
+                    raise RateLimitExceeded(host, parse_retry_after(response.headers.get("retry-after")))
+                return response
+
+        return await cls.get_upstream(url).call(
+            send,
+            is_failure=lambda response: response.status_code in RETRYABLE_STATUS_CODES
+        )
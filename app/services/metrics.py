@@ -0,0 +1,163 @@
+import time
+from typing import Dict, Union
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+from app.services.cache import TTLCache
+from app.services.shared_cache import TieredCache
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_LATENCY = Histogram(
+    "weather_api_stage_latency_seconds",
+    "Latency of each stage of the request path",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_LATENCY = Histogram(
+    "weather_api_request_latency_seconds",
+    "End-to-end request latency per router",
+    ["router"],
+    buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "weather_api_in_flight_requests",
+    "Requests currently being handled per router",
+    ["router"]
+)
+UPSTREAM_RESPONSES = Counter(
+    "weather_api_upstream_responses_total",
+    "Upstream responses by upstream and status code",
+    ["upstream", "status"]
+)
+RATE_LIMIT_DECISIONS = Counter(
+    "weather_api_rate_limit_decisions_total",
+    "Token bucket decisions by scope (client router or upstream) and outcome",
+    ["scope", "decision"]
+)
+PREFETCH_REFRESHES = Counter(
+    "weather_api_prefetch_refreshes_total",
+    "Background refreshes of hot locations by kind (weather, forecast) and result",
+    ["kind", "result"]
+)
+HOT_LOCATIONS = Gauge(
+    "weather_api_prefetch_hot_locations",
+    "Locations currently kept warm by the prefetch scheduler"
+)
+SUBSCRIPTION_CELLS = Gauge(
+    "weather_api_subscription_cells",
+    "Grid cells with an active subscription refresh loop"
+)
+SUBSCRIPTION_MESSAGES = Counter(
+    "weather_api_subscription_messages_total",
+    "Updates pushed to subscribers, by reason (initial state or outfit change)",
+    ["reason"]
+)
+GEMINI_DISPATCH = Counter(
+    "weather_api_gemini_dispatch_total",
+    "Gemini dispatcher outcomes (dispatched, coalesced, rejected, expired in queue, deadline_missed, timed_out)",
+    ["outcome"]
+)
+GEMINI_QUEUE_DEPTH = Gauge(
+    "weather_api_gemini_queue_depth",
+    "Gemini generations waiting for a concurrency slot"
+)
+CONDITIONAL_REQUESTS = Counter(
+    "weather_api_conditional_responses_total",
+    "Responses carrying observation validators, by outcome (full body or 304 not_modified)",
+    ["outcome"]
+)
+
+# Pre-bound children so the hot path skips label lookups
+GEOCODE_LATENCY = STAGE_LATENCY.labels("geocode")
+WEATHER_LATENCY = STAGE_LATENCY.labels("weather")
+CLOTHING_LATENCY = STAGE_LATENCY.labels("clothing")
+GEMINI_LATENCY = STAGE_LATENCY.labels("gemini")
+SERIALIZATION_LATENCY = STAGE_LATENCY.labels("serialization")
+COMPRESSION_LATENCY = STAGE_LATENCY.labels("compression")
+
+ROUTER_PREFIXES = (("/chat", "chat"), ("/weather", "weather"))
+
+
+class CacheCollector:
+    """
+    Exposes hit/miss counters and sizes of registered caches at scrape time,
+    so lookups themselves only increment plain integers
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, Union[TTLCache, TieredCache]] = {}
+
+    def collect(self):
+        requests = CounterMetricFamily(
+            "weather_api_cache_requests",
+            "Cache lookups by cache and result",
+            labels=["cache", "result"]
+        )
+        entries = GaugeMetricFamily(
+            "weather_api_cache_entries",
+            "Entries currently held per cache",
+            labels=["cache"]
+        )
+        shared_requests = CounterMetricFamily(
+            "weather_api_shared_cache_requests",
+            "Shared (L2) cache lookups after an in-process miss, by cache and result",
+            labels=["cache", "result"]
+        )
+        for name, cache in self.caches.items():
+            requests.add_metric([name, "hit"], cache.hits)
+            requests.add_metric([name, "miss"], cache.misses)
+            entries.add_metric([name], len(cache))
+            if isinstance(cache, TieredCache):
+                shared_requests.add_metric([name, "hit"], cache.l2_hits)
+                shared_requests.add_metric([name, "miss"], cache.l2_misses)
+        yield requests
+        yield entries
+        yield shared_requests
+
+
+cache_collector = CacheCollector()
+REGISTRY.register(cache_collector)
+
+
+def register_cache(name: str, cache: Union[TTLCache, TieredCache]) -> None:
+    cache_collector.caches[name] = cache
+
+
+def render_metrics() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware tracking in-flight requests and latency per router
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        router = None
+        for prefix, name in ROUTER_PREFIXES:
+            if path.startswith(prefix):
+                router = name
+                break
+        if router is None:
+            await self.app(scope, receive, send)
+            return
+
+        in_flight = IN_FLIGHT.labels(router)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(router).observe(time.perf_counter() - started)
+
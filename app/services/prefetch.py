@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import (
+    PREFETCH_ENABLED,
+    PREFETCH_INTERVAL,
+    PREFETCH_HOT_SIZE,
+    PREFETCH_MIN_SCORE,
+    PREFETCH_HALF_LIFE,
+    PREFETCH_LEAD,
+    PREFETCH_CONCURRENCY,
+    PREFETCH_FORECAST,
+    PREFETCH_SEED_LOCATIONS,
+    PREFETCH_SEED_FILE,
+    WEATHER_CACHE_TTL,
+    FORECAST_CACHE_TTL
+)
+from app.services.forecast_service import ForecastService
+from app.services.metrics import HOT_LOCATIONS, PREFETCH_REFRESHES
+from app.services.weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a location whose refresh failed is tried again
+FAILURE_BACKOFF = 60.0
+
+
+class LocationTracker:
+    """
+    Request frequency per normalized location as exponentially decayed
+    counts, so yesterday's hot spots cool down on their own
+    """
+
+    def __init__(self, half_life: float, max_tracked: int):
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        # key -> (score at `updated`, updated, location as last requested)
+        self._scores: Dict[str, Tuple[float, float, str]] = {}
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated) / self.half_life)
+
+    def record(self, location: str) -> None:
+        key = WeatherService.normalize_location(location)
+        if not key:
+            return
+        now = time.monotonic()
+        entry = self._scores.get(key)
+        score = self._decayed(entry[0], entry[1], now) + 1 if entry else 1.0
+        self._scores[key] = (score, now, location)
+        if len(self._scores) > self.max_tracked:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        ranked = sorted(self._scores.items(), key=lambda item: self._decayed(item[1][0], item[1][1], now), reverse=True)
+        self._scores = dict(ranked[:self.max_tracked // 2])
+
+    def hottest(self, limit: int, min_score: float) -> List[Tuple[str, str]]:
+        """
+        Up to limit (key, location) pairs scoring at least min_score, hottest first
+        """
+        now = time.monotonic()
+        scored = [
+            (self._decayed(score, updated, now), key, location)
+            for key, (score, updated, location) in self._scores.items()
+        ]
+        scored = [item for item in scored if item[0] >= min_score]
+        scored.sort(reverse=True)
+        return [(key, location) for _, key, location in scored[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class PrefetchScheduler:
+    """
+    Background task that keeps weather (and optionally forecast tables) for
+    the hot set of locations fresh. The hot set is the seed list plus the
+    most requested locations. Each location refreshes at its own point in the
+    last PREFETCH_LEAD fraction of the TTL, so refreshes spread out instead
+    of bursting.
+    """
+
+    def __init__(self):
+        self.tracker = LocationTracker(PREFETCH_HALF_LIFE, max_tracked=PREFETCH_HOT_SIZE * 10)
+        self.seeds: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._in_progress: set = set()
+        self._failed_until: Dict[str, float] = {}
+
+    def record(self, location: str) -> None:
+        """
+        Count a request for location (called by the routers)
+        """
+        self.tracker.record(location)
+
+    @staticmethod
+    def load_seeds() -> List[str]:
+        seeds = list(PREFETCH_SEED_LOCATIONS)
+        if PREFETCH_SEED_FILE:
+            try:
+                with open(PREFETCH_SEED_FILE, encoding="utf-8") as f:
+                    seeds.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+            except OSError as e:
+                logger.warning(f"Unable to read PREFETCH_SEED_FILE {PREFETCH_SEED_FILE}: {str(e)}")
+        return seeds
+
+    async def start(self) -> None:
+        """
+        Start the scheduler (called from the app lifespan); seeds are warmed in the background
+        """
+        if not PREFETCH_ENABLED or self._task is not None:
+            return
+        for location in self.load_seeds():
+            self.seeds.setdefault(WeatherService.normalize_location(location), location)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Prefetch scheduler started ({len(self.seeds)} seed locations)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def hot_locations(self) -> List[Tuple[str, str]]:
+        hot = dict(self.seeds)
+        for key, location in self.tracker.hottest(PREFETCH_HOT_SIZE, PREFETCH_MIN_SCORE):
+            if len(hot) >= max(PREFETCH_HOT_SIZE, len(self.seeds)):
+                break
+            hot.setdefault(key, location)
+        return list(hot.items())
+
+    @staticmethod
+    def refresh_point(key: str) -> float:
+        """
+        Fraction of the TTL after which key is refreshed, stable per key and
+        spread over [1 - PREFETCH_LEAD, 1 - PREFETCH_LEAD / 2]
+        """
+        jitter = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=2).digest(), "big") / 0xFFFF
+        return 1 - PREFETCH_LEAD * (1 - jitter / 2)
+
+    def due_kinds(self, key: str, location: str) -> List[str]:
+        """
+        Which caches ("weather", "forecast") need refreshing for a location
+        """
+        coordinates = WeatherService.cached_coordinates(location)
+        if coordinates is None:
+            return ["weather", "forecast"] if PREFETCH_FORECAST else ["weather"]
+
+        lat, lng = coordinates[0], coordinates[1]
+        point = self.refresh_point(key)
+        kinds = []
+        age = WeatherService.weather_age(lat, lng)
+        if age is None or age >= WEATHER_CACHE_TTL * point:
+            kinds.append("weather")
+        if PREFETCH_FORECAST:
+            remaining = ForecastService.forecast_ttl_remaining(lat, lng)
+            if remaining is None or remaining <= FORECAST_CACHE_TTL * (1 - point):
+                kinds.append("forecast")
+        return kinds
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+        while True:
+            started = time.monotonic()
+            try:
+                await self.tick(semaphore)
+            except Exception as e:
+                logger.error(f"Prefetch pass failed: {str(e)}")
+            await asyncio.sleep(max(0.0, PREFETCH_INTERVAL - (time.monotonic() - started)))
+
+    async def tick(self, semaphore: asyncio.Semaphore) -> None:
+        """
+        One scheduler pass: find due locations and refresh them, with starts
+        spaced evenly over the pass interval
+        """
+        now = time.monotonic()
+        hot = self.hot_locations()
+        HOT_LOCATIONS.set(len(hot))
+
+        due = []
+        for key, location in hot:
+            if key in self._in_progress or self._failed_until.get(key, 0) > now:
+                continue
+            kinds = self.due_kinds(key, location)
+            if kinds:
+                due.append((key, location, kinds))
+        if not due:
+            return
+
+        spacing = PREFETCH_INTERVAL / len(due)
+        tasks = []
+        for key, location, kinds in due:
+            self._in_progress.add(key)
+            tasks.append(asyncio.create_task(self._refresh(semaphore, key, location, kinds)))
+            await asyncio.sleep(spacing)
+        await asyncio.gather(*tasks)
+
+    async def _refresh(self, semaphore: asyncio.Semaphore, key: str, location: str, kinds: List[str]) -> None:
+        kind = kinds[0]
+        try:
+            async with semaphore:
+                lat, lng, _ = await WeatherService.get_coordinates(location)
+                for kind in kinds:
+                    if kind == "weather":
+                        await WeatherService.refresh_weather(lat, lng)
+                    else:
+                        await ForecastService.refresh_forecast_table(lat, lng)
+                    PREFETCH_REFRESHES.labels(kind, "ok").inc()
+            self._failed_until.pop(key, None)
+        except Exception as e:
+            PREFETCH_REFRESHES.labels(kind, "error").inc()
+            self._failed_until[key] = time.monotonic() + FAILURE_BACKOFF
+            logger.warning(f"Prefetch of {location} failed: {str(getattr(e, 'detail', e))}")
+        finally:
+            self._in_progress.discard(key)
+
+
+prefetcher = PrefetchScheduler()
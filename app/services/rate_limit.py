@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+from app.config.settings import (
+    RATE_LIMIT_BACKEND,
+    RATE_LIMIT_REDIS_URL,
+    RATE_LIMIT_MAX_KEYS,
+    OPENCAGE_RATE_LIMIT,
+    OPENCAGE_RATE_LIMIT_BURST,
+    GEMINI_RATE_LIMIT,
+    GEMINI_RATE_LIMIT_BURST,
+    UPSTREAM_QUOTA_MAX_WAIT
+)
+from app.services.cache import TTLCache, MISSING
+from app.services.metrics import RATE_LIMIT_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+# Upstream name -> (requests per second, burst)
+UPSTREAM_QUOTAS: Dict[str, Tuple[float, int]] = {
+    "opencage": (OPENCAGE_RATE_LIMIT, OPENCAGE_RATE_LIMIT_BURST),
+    "gemini": (GEMINI_RATE_LIMIT, GEMINI_RATE_LIMIT_BURST)
+}
+
+
+class RateLimitExceeded(HTTPException):
+    """
+    Raised when a token bucket cannot grant a request within its deadline;
+    surfaces as a 429 with Retry-After
+    """
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"Rate limit exceeded for {scope} - please retry in {retry_after:.1f}s",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Refills at `rate` tokens per second up to `capacity`. A request that has to
+    wait takes its tokens up front (the balance goes negative), so waiting
+    requests are granted in arrival order.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, cost: float, max_wait: float) -> Tuple[bool, float]:
+        """
+        Return (granted, seconds to wait). Nothing is taken when the wait would
+        exceed max_wait.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        wait = max(0.0, (cost - self.tokens) / self.rate)
+        if wait > max_wait:
+            return False, wait
+        self.tokens -= cost
+        return True, wait
+
+
+class InMemoryBackend:
+    """
+    Token buckets local to this worker. Idle buckets are dropped once they
+    would have refilled completely, so the number of tracked clients stays bounded.
+    """
+
+    def __init__(self, max_keys: int):
+        self.buckets = TTLCache(max_size=max_keys, default_ttl=60)
+
+    async def reserve(self, key: str, rate: float, capacity: float, cost: float, max_wait: float) -> Tuple[bool, float]:
+        bucket = self.buckets.get(key)
+        if bucket is MISSING:
+            bucket = TokenBucket(rate, capacity)
+        granted, wait = bucket.reserve(cost, max_wait)
+        self.buckets.set(key, bucket, ttl=(capacity - bucket.tokens) / rate + 1)
+        return granted, wait
+
+    async def close(self) -> None:
+        self.buckets.clear()
+
+
+# Same algorithm as TokenBucket.reserve, run atomically in Redis and clocked by
+# the Redis server so every worker sees the same buckets
+REDIS_RESERVE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = math.max(0, (cost - tokens) / rate)
+if wait > max_wait then
+    return {0, tostring(wait)}
+end
+tokens = tokens - cost
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(((capacity - tokens) / rate + 1) * 1000))
+return {1, tostring(wait)}
+"""
+
+
+class RedisBackend:
+    """
+    Token buckets shared by all workers through Redis (needs the optional
+    `redis` package)
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(REDIS_RESERVE_SCRIPT)
+
+    async def reserve(self, key: str, rate: float, capacity: float, cost: float, max_wait: float) -> Tuple[bool, float]:
+        granted, wait = await self.script(keys=[f"weather-api:rate-limit:{key}"], args=[rate, capacity, cost, max_wait])
+        return bool(int(granted)), float(wait)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class QuotaManager:
+    """
+    Token-bucket limits for API clients and upstream quotas. Requests that fit
+    within max_wait are delayed until their turn; the rest are shed at once
+    with RateLimitExceeded instead of failing slowly upstream.
+    """
+
+    def __init__(self):
+        self.local = InMemoryBackend(RATE_LIMIT_MAX_KEYS)
+        self.backend = self.local
+
+    async def startup(self) -> None:
+        """
+        Connect the shared backend when RATE_LIMIT_BACKEND is "redis" (called from the app lifespan)
+        """
+        if RATE_LIMIT_BACKEND != "redis" or self.backend is not self.local:
+            return
+        try:
+            self.backend = RedisBackend(RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.warning("RATE_LIMIT_BACKEND=redis but the redis package is not installed; using in-memory limits")
+            return
+        logger.info("Rate limits shared through Redis")
+
+    async def shutdown(self) -> None:
+        if self.backend is not self.local:
+            await self.backend.close()
+            self.backend = self.local
+        await self.local.close()
+
+    async def acquire(self, scope: str, key: str, rate: float, burst: int, max_wait: float, cost: float = 1) -> None:
+        """
+        Take cost tokens from the (scope, key) bucket, waiting up to max_wait
+        seconds for them. Raises RateLimitExceeded when they would take longer.
+        """
+        if rate <= 0:
+            return
+
+        bucket_key = f"{scope}:{key}"
+        try:
+            granted, wait = await self.backend.reserve(bucket_key, rate, burst, cost, max_wait)
+        except Exception as e:
+            # Keep limiting per worker rather than failing requests when Redis is unreachable
+            logger.warning(f"Shared rate limit backend failed, using local limits: {str(e)}")
+            granted, wait = await self.local.reserve(bucket_key, rate, burst, cost, max_wait)
+
+        if not granted:
+            RATE_LIMIT_DECISIONS.labels(scope, "rejected").inc()
+            raise RateLimitExceeded(scope, wait)
+        if wait > 0:
+            RATE_LIMIT_DECISIONS.labels(scope, "queued").inc()
+            await asyncio.sleep(wait)
+        else:
+            RATE_LIMIT_DECISIONS.labels(scope, "allowed").inc()
+
+    async def acquire_upstream(self, name: str) -> None:
+        """
+        Wait for quota to call the named upstream (see UPSTREAM_QUOTAS)
+        """
+        rate, burst = UPSTREAM_QUOTAS[name]
+        await self.acquire(name, "global", rate, burst, UPSTREAM_QUOTA_MAX_WAIT)
+
+
+quota_manager = QuotaManager()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+
+from app.config.settings import (
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+    UPSTREAM_BREAKER_RECOVERY_TIMEOUT,
+    UPSTREAM_MAX_RETRIES,
+    UPSTREAM_RETRY_BASE_DELAY,
+    UPSTREAM_RETRY_BUDGET_RATIO,
+    UPSTREAM_RETRY_BUDGET_MAX,
+    UPSTREAM_HEDGE_ENABLED,
+    UPSTREAM_HEDGE_MIN_DELAY,
+    UPSTREAM_HEDGE_MIN_SAMPLES
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open
+    """
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit breaker for {name} is open")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures, rejects calls for
+    recovery_timeout seconds, then lets a single probe call through (half-open)
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError if the call must not go upstream
+        """
+        if self.state == "closed":
+            return
+
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.recovery_timeout:
+                raise CircuitOpenError(self.name)
+            self.state = "half-open"
+            self.probe_started_at = None
+
+        # Half-open: one probe at a time; a probe that never reported back
+        # (e.g. an abandoned stream) is replaced after recovery_timeout
+        if self.probe_started_at is not None and now - self.probe_started_at < self.recovery_timeout:
+            raise CircuitOpenError(self.name)
+        self.probe_started_at = now
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            logger.info(f"Circuit breaker for {self.name} closed")
+        self.state = "closed"
+        self.failures = 0
+        self.probe_started_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half-open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit breaker for {self.name} opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
+
+
+class RetryBudget:
+    """
+    Token bucket shared by all calls to an upstream: every call deposits
+    `ratio` tokens and every retry or hedge spends one, so extra load stays
+    below `ratio` of the original traffic during an outage
+    """
+
+    def __init__(self, ratio: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful call latencies
+    """
+
+    def __init__(self, size: int = 200):
+        self.samples: deque = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Upstream:
+    """
+    Resilience policy for one upstream dependency: circuit breaker, jittered
+    retries limited by a retry budget, and optional hedged requests sent after
+    the observed p95 latency. Exceptions in reject_on (the upstream refusing
+    the call, e.g. over quota) open the breaker like failures but are never
+    retried. With a deadline, all attempts of one call share
+    that many seconds; an attempt still running when it passes is cancelled
+    and timeout_error() is raised instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        reject_on: Tuple[Type[BaseException], ...] = (),
+        hedge: bool = UPSTREAM_HEDGE_ENABLED,
+        deadline: Optional[float] = None,
+        timeout_error: Callable[[], BaseException] = asyncio.TimeoutError
+    ):
+        self.name = name
+        self.retry_on = retry_on
+        self.reject_on = reject_on
+        self.hedge = hedge
+        self.deadline = deadline
+        self.timeout_error = timeout_error
+        self.breaker = CircuitBreaker(name, UPSTREAM_BREAKER_FAILURE_THRESHOLD, UPSTREAM_BREAKER_RECOVERY_TIMEOUT)
+        self.retry_budget = RetryBudget(UPSTREAM_RETRY_BUDGET_RATIO, UPSTREAM_RETRY_BUDGET_MAX)
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latency.samples) < UPSTREAM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(UPSTREAM_HEDGE_MIN_DELAY, self.latency.percentile(0.95))
+
+    async def call(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        is_failure: Callable[[Any], bool] = lambda result: False
+    ) -> Any:
+        """
+        Run func() under the policy. Exceptions in retry_on and results for which
+        is_failure() is true count as failures and are retried while the budget
+        allows; the last failing result is returned (or exception raised).
+        """
+        self.breaker.before_call()
+        self.retry_budget.deposit()
+        expires_at = None if self.deadline is None else time.monotonic() + self.deadline
+
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            if attempt:
+                # Full jitter exponential backoff
+                backoff = random.uniform(0, UPSTREAM_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                if expires_at is not None and time.monotonic() + backoff >= expires_at:
+                    break
+                if not self.retry_budget.try_withdraw():
+                    break
+                await asyncio.sleep(backoff)
+
+            started = time.monotonic()
+            try:
+                result = await self._attempt(func, is_failure, expires_at)
+            except self.reject_on:
+                # Retrying a refusal only adds load against an exhausted quota
+                self.breaker.record_failure()
+                raise
+            except self.retry_on as e:
+                # repr: several httpx exceptions (timeouts) have an empty message
+                logger.warning(f"{self.name} call failed (attempt {attempt + 1}): {e!r}")
+                outcome = (False, e)
+                continue
+
+            if is_failure(result):
+                outcome = (True, result)
+                continue
+
+            self.breaker.record_success()
+            self.latency.record(time.monotonic() - started)
+            return result
+
+        # Only calls that fail after all retries count towards opening the breaker
+        self.breaker.record_failure()
+        is_result, value = outcome
+        if is_result:
+            return value
+        raise value
+
+    async def _attempt(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        is_failure: Callable[[Any], bool],
+        expires_at: Optional[float]
+    ) -> Any:
+        if expires_at is None:
+            return await self._hedged(func, is_failure)
+        try:
+            return await asyncio.wait_for(self._hedged(func, is_failure), max(0.0, expires_at - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise self.timeout_error()
+
+    async def _hedged(self, func: Callable[[], Awaitable[Any]], is_failure: Callable[[Any], bool]) -> Any:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await func()
+
+        first = asyncio.ensure_future(func())
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done or not self.retry_budget.try_withdraw():
+                return await first
+
+            tasks.append(asyncio.ensure_future(func()))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and not is_failure(task.result()):
+                        return task.result()
+            # Both attempts failed: report the original one
+            return first.result()
+        finally:
+            # Also reached when the call is cancelled (deadline), so no attempt is left running
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Hashable, Optional
+
+from app.config.settings import (
+    SHARED_CACHE_BACKEND,
+    SHARED_CACHE_PATH,
+    SHARED_CACHE_REDIS_URL,
+    SHARED_CACHE_PREFIX
+)
+from app.services.cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+# Purge expired rows from the SQLite store after this many writes
+SQLITE_PURGE_INTERVAL = 1000
+
+
+class SQLiteCacheBackend:
+    """
+    Shared L2 store for workers on one host: a WAL-mode SQLite file, ideally
+    on tmpfs (/dev/shm), read through a memory map. Readers never wait for
+    writers, and every worker sees the same entries. sqlite3 calls block
+    (up to the busy timeout when another worker holds the write lock), so
+    they run on one dedicated thread instead of the event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        self._connection = sqlite3.connect(path, timeout=0.2, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=OFF")
+        self._connection.execute("PRAGMA mmap_size=67108864")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL) "
+            "WITHOUT ROWID"
+        )
+        self._writes = 0
+
+    async def _run(self, func, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def get(self, key: str) -> Any:
+        """
+        Return (value, expires_at) for key, or MISSING
+        """
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: Any, expires_at: float) -> None:
+        await self._run(self._set, key, json.dumps(value), expires_at)
+
+    async def close(self) -> None:
+        await self._run(self._connection.close)
+        self._executor.shutdown(wait=False)
+
+    def _get(self, key: str) -> Any:
+        row = self._connection.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return MISSING
+        return json.loads(row[0]), row[1]
+
+    def _set(self, key: str, encoded: str, expires_at: float) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, encoded, expires_at)
+        )
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_INTERVAL == 0:
+            self._connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+
+class RedisCacheBackend:
+    """
+    Shared L2 store on any Redis-protocol server (needs the optional `redis` package)
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Any:
+        encoded = await self.client.get(key)
+        if encoded is None:
+            return MISSING
+        expires_at, value = json.loads(encoded)
+        if expires_at <= time.time():
+            return MISSING
+        return value, expires_at
+
+    async def set(self, key: str, value: Any, expires_at: float) -> None:
+        ttl_ms = int((expires_at - time.time()) * 1000)
+        if ttl_ms > 0:
+            await self.client.set(key, json.dumps([expires_at, value]), px=ttl_ms)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class SharedCache:
+    """
+    The L2 backend shared by all workers, opened at app startup according to
+    SHARED_CACHE_BACKEND ("none", "sqlite" or "redis")
+    """
+    backend = None
+
+    @classmethod
+    async def startup(cls) -> None:
+        if cls.backend is not None or SHARED_CACHE_BACKEND == "none":
+            return
+        try:
+            if SHARED_CACHE_BACKEND == "sqlite":
+                cls.backend = SQLiteCacheBackend(SHARED_CACHE_PATH)
+            elif SHARED_CACHE_BACKEND == "redis":
+                cls.backend = RedisCacheBackend(SHARED_CACHE_REDIS_URL)
+            else:
+                logger.warning(f"Unknown SHARED_CACHE_BACKEND '{SHARED_CACHE_BACKEND}'; using in-process caches only")
+                return
+        except ImportError:
+            logger.warning("SHARED_CACHE_BACKEND=redis but the redis package is not installed; using in-process caches only")
+            return
+        except sqlite3.Error as e:
+            logger.warning(f"Unable to open shared cache {SHARED_CACHE_PATH}: {str(e)}; using in-process caches only")
+            return
+        logger.info(f"Shared cache enabled (backend={SHARED_CACHE_BACKEND})")
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        if cls.backend is not None:
+            await cls.backend.close()
+            cls.backend = None
+
+
+class TieredCache:
+    """
+    In-process L1 (TTLCache) in front of the shared L2 (SharedCache.backend).
+    L2 hits are copied into L1 for the rest of their lifetime. Values must be
+    JSON serializable; tuples come back from L2 as lists. L2 errors count as
+    misses, so a broken L2 only costs hit rate.
+    """
+
+    def __init__(self, name: str, max_size: int, default_ttl: float):
+        self.name = name
+        self.l1 = TTLCache(max_size=max_size, default_ttl=default_ttl)
+        self.l2_hits = 0
+        self.l2_misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.l1.hits
+
+    @property
+    def misses(self) -> int:
+        return self.l1.misses
+
+    def __len__(self) -> int:
+        return len(self.l1)
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{SHARED_CACHE_PREFIX}{self.name}:{json.dumps(key)}"
+
+    def get_local(self, key: Hashable) -> Any:
+        """
+        L1 lookup only, without awaiting anything
+        """
+        return self.l1.get(key)
+
+    async def get_shared(self, key: Hashable) -> Any:
+        """
+        L2 lookup only (MISSING when there is no L2); hits are copied into L1
+        """
+        backend = SharedCache.backend
+        if backend is None:
+            return MISSING
+        try:
+            entry = await backend.get(self._shared_key(key))
+        except Exception as e:
+            logger.warning(f"Shared cache lookup failed for {self.name}: {str(e)}")
+            entry = MISSING
+        if entry is MISSING:
+            self.l2_misses += 1
+            return MISSING
+
+        self.l2_hits += 1
+        value, expires_at = entry
+        self.l1.set(key, value, ttl=min(self.l1.default_ttl, expires_at - time.time()))
+        return value
+
+    async def get(self, key: Hashable) -> Any:
+        value = self.l1.get(key)
+        if value is MISSING:
+            value = await self.get_shared(key)
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, shared: bool = True) -> None:
+        """
+        Store value in L1 and, unless shared is False, in L2
+        """
+        ttl = self.l1.default_ttl if ttl is None else ttl
+        self.l1.set(key, value, ttl=ttl)
+        backend = SharedCache.backend
+        if backend is None or not shared:
+            return
+        try:
+            await backend.set(self._shared_key(key), value, time.time() + ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache write failed for {self.name}: {str(e)}")
+
+    def clear(self) -> None:
+        """
+        Clear L1 (the shared tier belongs to every worker and is left alone)
+        """
+        self.l1.clear()
+        self.l2_hits = 0
+        self.l2_misses = 0
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.config.settings import (
+    SUBSCRIPTION_MIN_INTERVAL,
+    SUBSCRIPTION_QUEUE_SIZE,
+    WEATHER_CACHE_TTL
+)
+from app.models.schemas import ClothingRecommendation
+from app.services.clothing_service import ClothingService
+from app.services.metrics import SUBSCRIPTION_CELLS, SUBSCRIPTION_MESSAGES
+from app.services.weather_service import WeatherService
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a cell whose refresh failed is checked again
+RETRY_DELAY = 30.0
+
+
+class Subscriber:
+    """
+    One connected client: a bounded outbox of messages and the locations it
+    follows (location as requested -> (grid cell, formatted location))
+    """
+
+    def __init__(self, max_queue: int = SUBSCRIPTION_QUEUE_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.locations: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+    def push(self, message: Dict[str, Any]) -> None:
+        """
+        Queue a message; a client that falls behind loses its oldest messages
+        rather than stalling the refresh loop
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class CellWatch:
+    """
+    Shared refresh loop state for one grid cell and everyone following it
+    """
+
+    def __init__(self, lat: float, lng: float):
+        self.lat = lat
+        self.lng = lng
+        self.subscribers: Dict[Subscriber, Set[str]] = {}
+        self.weather_data: Optional[Dict[str, Any]] = None
+        self.outfit: Optional[Tuple] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class SubscriptionHub:
+    """
+    Fans weather changes out to subscribed clients. Each subscribed grid
+    cell has one loop that refreshes the observation when it expires (one
+    upstream call per cell, however many clients follow it). A message is
+    pushed only when the refresh changes the ClothingService output for the
+    cell, not on every new reading.
+    """
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, int], CellWatch] = {}
+
+    async def subscribe(self, subscriber: Subscriber, location: str) -> None:
+        """
+        Follow location: a "subscribed" message is queued, followed by the
+        current update (right away when the cell is already watched, otherwise
+        after its first refresh). Raises HTTPException when the location
+        cannot be geocoded.
+        """
+        if location in subscriber.locations:
+            return
+        lat, lng, formatted_location = await WeatherService.get_coordinates(location)
+        cell = WeatherService.grid_cell(lat, lng)
+        subscriber.locations[location] = (cell, formatted_location)
+        subscriber.push({"type": "subscribed", "location": location})
+
+        watch = self.cells.get(cell)
+        if watch is None:
+            watch = self.cells[cell] = CellWatch(lat, lng)
+            watch.task = asyncio.create_task(self._watch(cell, watch))
+            SUBSCRIPTION_CELLS.set(len(self.cells))
+        watch.subscribers.setdefault(subscriber, set()).add(location)
+        if watch.weather_data is not None:
+            subscriber.push(self._message(location, formatted_location, watch.weather_data))
+            SUBSCRIPTION_MESSAGES.labels("initial").inc()
+
+    def unsubscribe(self, subscriber: Subscriber, location: str) -> None:
+        entry = subscriber.locations.pop(location, None)
+        if entry is None:
+            return
+        cell = entry[0]
+        watch = self.cells.get(cell)
+        if watch is None:
+            return
+        locations = watch.subscribers.get(subscriber, set())
+        locations.discard(location)
+        if not locations:
+            watch.subscribers.pop(subscriber, None)
+        if not watch.subscribers:
+            # Last follower gone: stop refreshing the cell
+            watch.task.cancel()
+            del self.cells[cell]
+            SUBSCRIPTION_CELLS.set(len(self.cells))
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        for location in list(subscriber.locations):
+            self.unsubscribe(subscriber, location)
+
+    async def stop(self) -> None:
+        """
+        Cancel every refresh loop (called from the app lifespan)
+        """
+        tasks = [watch.task for watch in self.cells.values()]
+        self.cells.clear()
+        SUBSCRIPTION_CELLS.set(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _message(location: str, formatted_location: str, weather_data: Dict[str, Any]) -> Dict[str, Any]:
+        weather = WeatherService.to_weather_response(formatted_location, weather_data)
+        recommendation = ClothingRecommendation(
+            location=formatted_location,
+            weather=weather,
+            recommendations=ClothingService.get_clothing_recommendations(weather.temperature, weather.weather_condition),
+            general_advice=ClothingService.get_general_advice(weather.temperature, weather.weather_condition)
+        )
+        return {"type": "update", "location": location, "clothing_recommendation": recommendation.model_dump()}
+
+    @staticmethod
+    def _outfit(weather_data: Dict[str, Any]) -> Tuple:
+        """
+        What a push depends on: the ClothingService output for the observation
+        """
+        temperature = weather_data["temperature"]
+        weather_condition = weather_data.get("weather", "Clear")
+        recommendations = ClothingService.get_clothing_recommendations(temperature, weather_condition)
+        return tuple(sorted(recommendations.items())), ClothingService.get_general_advice(temperature, weather_condition)
+
+    def _publish(self, watch: CellWatch, weather_data: Dict[str, Any]) -> None:
+        outfit = self._outfit(weather_data)
+        first = watch.weather_data is None
+        watch.weather_data = weather_data
+        if outfit == watch.outfit:
+            return
+        watch.outfit = outfit
+        for subscriber, locations in list(watch.subscribers.items()):
+            for location in locations:
+                subscriber.push(self._message(location, subscriber.locations[location][1], weather_data))
+                SUBSCRIPTION_MESSAGES.labels("initial" if first else "change").inc()
+
+    async def _watch(self, cell: Tuple[int, int], watch: CellWatch) -> None:
+        while True:
+            try:
+                age = WeatherService.weather_age(watch.lat, watch.lng)
+                if age is None or age >= WEATHER_CACHE_TTL:
+                    await WeatherService.refresh_weather(watch.lat, watch.lng)
+                self._publish(watch, await WeatherService.get_weather_data(watch.lat, watch.lng))
+                # Sleep until the observation expires (it may be refreshed sooner by requests or prefetch)
+                delay = WEATHER_CACHE_TTL - (WeatherService.weather_age(watch.lat, watch.lng) or 0.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Subscription refresh failed for cell {cell}: {str(getattr(e, 'detail', e))}")
+                delay = RETRY_DELAY
+            await asyncio.sleep(max(SUBSCRIPTION_MIN_INTERVAL, delay))
+
+
+subscription_hub = SubscriptionHub()
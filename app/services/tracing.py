@@ -0,0 +1,123 @@
+import functools
+import logging
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config.settings import (
+    TRACING_ENABLED,
+    TRACING_EXPORTER,
+    TRACING_FILE,
+    TRACING_SAMPLE_RATIO,
+    TRACING_SERVICE_NAME
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _NoopSpan:
+    """
+    Stand-in used when tracing is disabled: entering, exiting and setting
+    attributes all do nothing
+    """
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# Set by setup_tracing(); None means tracing is off and spans are no-ops
+_tracer = None
+_provider = None
+_trace_api = None
+
+
+def setup_tracing() -> None:
+    """
+    Configure OpenTelemetry when TRACING_ENABLED is set. The SDK is an optional
+    dependency and is only imported here.
+    """
+    global _tracer, _provider, _trace_api
+    if not TRACING_ENABLED or _tracer is not None:
+        return
+
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed; tracing disabled")
+        return
+
+    if TRACING_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http; tracing disabled")
+            return
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        exporter = OTLPSpanExporter()
+    elif TRACING_EXPORTER == "file":
+        exporter = ConsoleSpanExporter(out=open(TRACING_FILE, "a", encoding="utf-8"))
+    else:
+        exporter = ConsoleSpanExporter(out=sys.stdout)
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO))
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    _trace_api = trace
+    _tracer = _provider.get_tracer("weather-api")
+    logger.info(f"Tracing enabled (exporter={TRACING_EXPORTER}, sample_ratio={TRACING_SAMPLE_RATIO})")
+
+
+def shutdown_tracing() -> None:
+    """
+    Flush pending spans and stop the exporter
+    """
+    global _tracer, _provider, _trace_api
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = None
+    _provider = None
+    _trace_api = None
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Context manager for a span nested under the current one (no-op when disabled)
+    """
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def current_span():
+    """
+    The active span, for adding attributes such as cache hits (no-op when disabled)
+    """
+    if _tracer is None:
+        return NOOP_SPAN
+    return _trace_api.get_current_span()
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator wrapping an async route handler in a span
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
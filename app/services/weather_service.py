@@ -1,17 +1,150 @@
-import requests
+import asyncio
+import httpx
 import logging
-from typing import Tuple, Optional, Dict, Any
+import math
+import re
+import time
+from typing import Tuple, Optional, Dict, Any, Set
 from fastapi import HTTPException
 
-from app.config.settings import OPENCAGE_API_KEY, OPENCAGE_BASE_URL, WEATHER_BASE_URL
+from app.config.settings import (
+    OPENCAGE_API_KEY,
+    OPENCAGE_BASE_URL,
+    WEATHER_BASE_URL,
+    GEOCODE_CACHE_MAX_SIZE,
+    GEOCODE_CACHE_TTL,
+    GEOCODE_NEGATIVE_CACHE_TTL,
+    GAZETTEER_FILE,
+    GAZETTEER_MIN_POPULATION,
+    GAZETTEER_FUZZY,
+    GAZETTEER_FUZZY_MAX_CANDIDATES,
+    GAZETTEER_INDEX_FILE,
+    WEATHER_CACHE_CELL_SIZE,
+    WEATHER_CACHE_TTL,
+    WEATHER_CACHE_STALE_TTL,
+    WEATHER_CACHE_MAX_SIZE
+)
 from app.models.schemas import WeatherResponse
+from app.services.cache import MISSING
+from app.services.gazetteer import Gazetteer
+from app.services.http_client import HTTPClient
+from app.services.metrics import GEOCODE_LATENCY, WEATHER_LATENCY, register_cache
+from app.services.rate_limit import quota_manager
+from app.services.resilience import CircuitOpenError
+from app.services.shared_cache import TieredCache
+from app.services.tracing import current_span, start_span
+from app.services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Normalized location -> (lat, lng, formatted_location), or None for "not found"
+geocode_cache = TieredCache("geocode", max_size=GEOCODE_CACHE_MAX_SIZE, default_ttl=GEOCODE_CACHE_TTL)
+
+# Grid cell -> (fetched_at wall-clock time, weather_data); entries outlive their
+# freshness window by WEATHER_CACHE_STALE_TTL so they can be served while a refresh runs
+weather_cache = TieredCache(
+    "weather",
+    max_size=WEATHER_CACHE_MAX_SIZE,
+    default_ttl=WEATHER_CACHE_TTL + WEATHER_CACHE_STALE_TTL
+)
+register_cache("geocode", geocode_cache)
+register_cache("weather", weather_cache)
+_refreshing_cells: Set[Tuple[int, int]] = set()
+_background_tasks: Set[asyncio.Task] = set()
+
+# Concurrent misses for the same location / grid cell share one upstream call
+geocode_flight = SingleFlight()
+weather_flight = SingleFlight()
+
 
 class WeatherService:
+    # Offline place index consulted before OpenCage (loaded at startup when configured)
+    gazetteer: Optional[Gazetteer] = None
+
+    @staticmethod
+    def load_gazetteer() -> None:
+        if GAZETTEER_FILE and WeatherService.gazetteer is None:
+            WeatherService.gazetteer = Gazetteer(
+                GAZETTEER_FILE,
+                min_population=GAZETTEER_MIN_POPULATION,
+                index_path=GAZETTEER_INDEX_FILE,
+                fuzzy_max_candidates=GAZETTEER_FUZZY_MAX_CANDIDATES
+            )
+
+    @staticmethod
+    def close_gazetteer() -> None:
+        if WeatherService.gazetteer is not None:
+            WeatherService.gazetteer.close()
+            WeatherService.gazetteer = None
+
+    @staticmethod
+    def normalize_location(location: str) -> str:
+        """
+        Build a cache key for a location name ("  Paris ,France " -> "paris, france")
+        """
+        location = re.sub(r"\s+", " ", location.strip().lower())
+        location = re.sub(r"\s*,\s*", ", ", location)
+        return location.strip(" ,.")
+
     @staticmethod
     async def get_coordinates(location: str) -> Tuple[float, float, str]:
+        """
+        Get coordinates from location, served from the geocode cache or the
+        offline gazetteer when possible, falling back to OpenCage
+        Returns: (latitude, longitude, formatted_location)
+        """
+        with GEOCODE_LATENCY.time(), start_span("geocode", {"location": location}):
+            return await WeatherService._resolve_coordinates(location)
+
+    @staticmethod
+    async def _resolve_coordinates(location: str) -> Tuple[float, float, str]:
+        key = WeatherService.normalize_location(location)
+        cached = geocode_cache.get_local(key)
+        if cached is MISSING and WeatherService.gazetteer is not None:
+            coordinates = WeatherService.gazetteer.lookup(location, fuzzy=False)
+            if coordinates is None and GAZETTEER_FUZZY:
+                # The fuzzy pass is CPU-bound; keep it off the event loop
+                coordinates = await asyncio.to_thread(WeatherService.gazetteer.lookup_fuzzy, location)
+            if coordinates is not None:
+                current_span().set_attribute("geocode.source", "gazetteer")
+                # Every worker has the gazetteer, so its answers stay out of the shared tier
+                await geocode_cache.set(key, coordinates, shared=False)
+                return coordinates
+
+        if cached is MISSING:
+            cached = await geocode_cache.get_shared(key)
+        if cached is not MISSING:
+            current_span().set_attribute("cache.hit", True)
+            if cached is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Location '{location}' not found"
+                )
+            return cached
+
+        current_span().set_attribute("cache.hit", False)
+        return await geocode_flight.do(
+            key, lambda: WeatherService._geocode_and_cache(key, location)
+        )
+
+    @staticmethod
+    async def _geocode_and_cache(key: str, location: str) -> Tuple[float, float, str]:
+        try:
+            coordinates = await WeatherService.fetch_coordinates(location)
+        except HTTPException as e:
+            if e.status_code == 404:
+                await geocode_cache.set(key, None, ttl=GEOCODE_NEGATIVE_CACHE_TTL)
+            raise
+
+        await geocode_cache.set(key, coordinates)
+        # Also remember the canonical name so "Paris, France" hits after "Paris"
+        formatted_key = WeatherService.normalize_location(coordinates[2])
+        if formatted_key != key:
+            await geocode_cache.set(formatted_key, coordinates)
+        return coordinates
+
+    @staticmethod
+    async def fetch_coordinates(location: str) -> Tuple[float, float, str]:
         """
         Get coordinates from location using OpenCage API
         Returns: (latitude, longitude, formatted_location)
@@ -25,7 +158,9 @@ class WeatherService:
         }
         
         try:
-            geocode_response = requests.get(OPENCAGE_BASE_URL, params=geocode_params, timeout=10)
+            # Queues for OpenCage quota, or raises a 429 right away when the wait would be too long
+            await quota_manager.acquire_upstream("opencage")
+            geocode_response = await HTTPClient.get(OPENCAGE_BASE_URL, params=geocode_params)
             
             if geocode_response.status_code != 200:
                 raise HTTPException(
@@ -50,13 +185,116 @@ class WeatherService:
             logger.info(f"Found coordinates: lat={lat}, lng={lng} for {formatted_location}")
             return lat, lng, formatted_location
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise HTTPException(status_code=408, detail="Geocoding request timeout - please try again")
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError:
             raise HTTPException(status_code=503, detail="Unable to connect to geocoding API")
+        except CircuitOpenError:
+            raise HTTPException(status_code=503, detail="Geocoding API temporarily unavailable - please try again later")
     
+    @staticmethod
+    def grid_cell(lat: float, lng: float) -> Tuple[int, int]:
+        """
+        Map coordinates to the weather cache grid cell that contains them
+        """
+        return (
+            math.floor(lat / WEATHER_CACHE_CELL_SIZE),
+            math.floor(lng / WEATHER_CACHE_CELL_SIZE)
+        )
+
     @staticmethod
     async def get_weather_data(lat: float, lng: float) -> Dict[str, Any]:
+        """
+        Get weather data for the grid cell containing (lat, lng).
+        Fresh entries are returned as-is; stale entries are returned immediately
+        while a single background refresh updates the cell.
+        """
+        with WEATHER_LATENCY.time(), start_span("weather", {"lat": lat, "lng": lng}):
+            return await WeatherService._get_cell_weather(lat, lng)
+
+    @staticmethod
+    async def _get_cell_weather(lat: float, lng: float) -> Dict[str, Any]:
+        cell = WeatherService.grid_cell(lat, lng)
+        cached = await weather_cache.get(cell)
+        span = current_span()
+        span.set_attribute("cache.hit", cached is not MISSING)
+        if cached is MISSING:
+            return await WeatherService._refresh_cell(cell, lat, lng)
+
+        fetched_at, weather_data = cached
+        is_stale = time.time() - fetched_at >= WEATHER_CACHE_TTL
+        span.set_attribute("cache.stale", is_stale)
+        if is_stale and cell not in _refreshing_cells:
+            _refreshing_cells.add(cell)
+            task = asyncio.create_task(WeatherService._background_refresh(cell, lat, lng))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return weather_data
+
+    @staticmethod
+    async def _refresh_cell(
+        cell: Tuple[int, int],
+        lat: float,
+        lng: float,
+        check_shared: bool = False
+    ) -> Dict[str, Any]:
+        async def fetch_and_cache() -> Dict[str, Any]:
+            if check_shared:
+                # Another worker may already have refreshed the cell
+                shared = await weather_cache.get_shared(cell)
+                if shared is not MISSING and time.time() - shared[0] < WEATHER_CACHE_TTL:
+                    return shared[1]
+            weather_data = await WeatherService.fetch_weather_data(lat, lng)
+            await weather_cache.set(cell, (time.time(), weather_data))
+            return weather_data
+
+        return await weather_flight.do(cell, fetch_and_cache)
+
+    @staticmethod
+    def cached_coordinates(location: str) -> Optional[Tuple[float, float, str]]:
+        """
+        Coordinates for location if they are in this worker's geocode cache
+        (no lookup, no cache statistics)
+        """
+        cached = geocode_cache.l1.peek(WeatherService.normalize_location(location))
+        return None if cached is MISSING else cached
+
+    @staticmethod
+    def observation_time(lat: float, lng: float) -> Optional[float]:
+        """
+        Unix time the cached observation for (lat, lng) was fetched, or None
+        """
+        cached = weather_cache.l1.peek(WeatherService.grid_cell(lat, lng))
+        return None if cached is MISSING else cached[0]
+
+    @staticmethod
+    def weather_age(lat: float, lng: float) -> Optional[float]:
+        """
+        Seconds since the cached observation for (lat, lng) was fetched, or None
+        """
+        fetched_at = WeatherService.observation_time(lat, lng)
+        return None if fetched_at is None else time.time() - fetched_at
+
+    @staticmethod
+    async def refresh_weather(lat: float, lng: float) -> None:
+        """
+        Fetch and cache the observation for the cell containing (lat, lng),
+        unless another worker has just refreshed it
+        """
+        await WeatherService._refresh_cell(WeatherService.grid_cell(lat, lng), lat, lng, check_shared=True)
+
+    @staticmethod
+    async def _background_refresh(cell: Tuple[int, int], lat: float, lng: float) -> None:
+        try:
+            await WeatherService._refresh_cell(cell, lat, lng, check_shared=True)
+        except Exception as e:
+            # Keep serving the stale entry; the next request will try again
+            logger.warning(f"Background weather refresh failed for cell {cell}: {str(e)}")
+        finally:
+            _refreshing_cells.discard(cell)
+
+    @staticmethod
+    async def fetch_weather_data(lat: float, lng: float) -> Dict[str, Any]:
         """
         Get weather data using Dragon Weather API
         """
@@ -67,7 +305,7 @@ class WeatherService:
         }
         
         try:
-            weather_response = requests.get(WEATHER_BASE_URL, params=weather_params, timeout=10)
+            weather_response = await HTTPClient.get(WEATHER_BASE_URL, params=weather_params)
             
             if weather_response.status_code != 200:
                 raise HTTPException(
@@ -77,10 +315,12 @@ class WeatherService:
             
             return weather_response.json()
             
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise HTTPException(status_code=408, detail="Weather request timeout - please try again")
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError:
             raise HTTPException(status_code=503, detail="Unable to connect to weather API")
+        except CircuitOpenError:
+            raise HTTPException(status_code=503, detail="Weather API temporarily unavailable - please try again later")
     
     @staticmethod
     async def get_weather_for_location(location: str) -> WeatherResponse:
@@ -93,6 +333,13 @@ class WeatherService:
         # Get weather data
         weather_data = await WeatherService.get_weather_data(lat, lng)
         
+        return WeatherService.to_weather_response(formatted_location, weather_data)
+    
+    @staticmethod
+    def to_weather_response(formatted_location: str, weather_data: Dict[str, Any]) -> WeatherResponse:
+        """
+        Validate a raw observation into a WeatherResponse
+        """
         # Extract weather information - Dragon Weather API returns data directly in root
         if "temperature" not in weather_data:
             raise HTTPException(
@@ -0,0 +1,51 @@
+"""
+Compare two benchmark result files (from startup.py, load.py or micro.py) and
+print the relative change of every numeric field they share.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 5]
+"""
+import argparse
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+# Numeric fields that describe the run rather than its outcome
+SKIPPED_FIELDS = {"environment", "config", "runs", "requests", "concurrency", "calls_per_batch", "cpu_count"}
+
+
+def numeric_fields(data: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key not in SKIPPED_FIELDS:
+                yield from numeric_fields(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, float(data)
+
+
+def load(path: str) -> Dict[str, float]:
+    with open(path, encoding="utf-8") as f:
+        return dict(numeric_fields(json.load(f)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.0,
+                        help="Only show fields that changed by at least this many percent")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    width = max((len(name) for name in baseline), default=0)
+    for name, before in baseline.items():
+        if name not in candidate:
+            continue
+        after = candidate[name]
+        change = (after - before) / before * 100 if before else 0.0
+        if abs(change) >= args.threshold:
+            print(f"{name:<{width}}  {before:>14.3f}  {after:>14.3f}  {change:+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
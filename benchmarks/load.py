@@ -0,0 +1,230 @@
+"""
+Load test: start the mock upstreams and the API, then drive /chat/,
+/chat/natural and /weather/{location} at a fixed concurrency and report
+throughput and latency percentiles per scenario.
+
+Usage:
+    python benchmarks/load.py [--scenarios weather,chat,natural] [--concurrency 32]
+        [--requests 1000] [--locations 200] [--gemini-latency lognormal:400:0.3]
+        [--weather-errors 0.05] [--output load.json]
+
+Pass --app-url to drive an API that is already running (its upstreams are
+then whatever it is configured with).
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from mock_upstreams import add_profile_arguments
+from results import PROJECT_ROOT, emit, percentile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (method, path, json body) for the n-th request of a scenario
+RequestFactory = Callable[[int], Tuple[str, str, Optional[Dict[str, Any]]]]
+
+
+def scenario_factories(locations: List[str]) -> Dict[str, RequestFactory]:
+    def location(n: int) -> str:
+        return locations[n % len(locations)]
+
+    return {
+        "weather": lambda n: ("GET", f"/weather/{location(n)}", None),
+        "chat": lambda n: ("POST", "/chat/", {"location": location(n), "question": "What should I wear today?"}),
+        "natural": lambda n: ("POST", "/chat/natural", {"question": f"Give me a packing tip for {location(n)}"})
+    }
+
+
+async def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not become ready within {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+@contextmanager
+def background_process(args: List[str], env: Dict[str, str], log_path: str) -> Iterator[subprocess.Popen]:
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(args, env=env, cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def app_environment(mock_url: str) -> Dict[str, str]:
+    """
+    Environment for the API under test, pointed at the mock upstreams
+    """
+    env = dict(os.environ)
+    for name in ("GAZETTEER_FILE", "GEMINI_CACHE_FILE"):
+        env.pop(name, None)
+    env.update({
+        "OPENCAGE_API_KEY": "benchmark",
+        "OPENCAGE_BASE_URL": f"{mock_url}/geocode/v1/json",
+        "WEATHER_BASE_URL": f"{mock_url}/weather",
+        "FORECAST_PROVIDER": "fixture",
+        "GEMINI_API_KEY": "benchmark",
+        "BENCH_GEMINI_URL": mock_url,
+        "TRACING_ENABLED": "false"
+    })
+    return env
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    factory: RequestFactory,
+    total: int,
+    concurrency: int,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Send total requests from concurrency workers and summarize latency per request
+    """
+    counter = itertools.count(offset)
+    end = offset + total
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        while True:
+            n = next(counter)
+            if n >= end:
+                return
+            method, path, body = factory(n)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    succeeded = statuses.get("200", 0)
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "success_ratio": round(succeeded / total, 4) if total else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0
+        },
+        "status_counts": dict(statuses)
+    }
+
+
+async def drive(args: argparse.Namespace, app_url: str) -> Dict[str, Any]:
+    locations = [f"benchtown {index}" for index in range(args.locations)]
+    factories = scenario_factories(locations)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=args.timeout) as client:
+        for name in args.scenarios:
+            if args.warmup:
+                await run_scenario(client, factories[name], args.warmup, args.concurrency)
+            # Continue after the warmup so --locations larger than --warmup still sees cold entries
+            results[name] = await run_scenario(
+                client, factories[name], args.requests, args.concurrency, offset=args.warmup
+            )
+    return results
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.app_url:
+        await wait_until_ready(f"{args.app_url}/")
+        return await drive(args, args.app_url)
+
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    log_dir = args.log_dir or tempfile.mkdtemp(prefix="weather-api-bench-")
+    os.makedirs(log_dir, exist_ok=True)
+
+    mock_command = [
+        sys.executable, os.path.join(BENCHMARKS_DIR, "mock_upstreams.py"),
+        "--port", str(args.mock_port)
+    ]
+    for name in ("geocode", "weather", "gemini"):
+        mock_command += [
+            f"--{name}-latency", getattr(args, f"{name}_latency"),
+            f"--{name}-errors", str(getattr(args, f"{name}_errors"))
+        ]
+    if args.seed is not None:
+        mock_command += ["--seed", str(args.seed)]
+    app_command = [sys.executable, os.path.join(BENCHMARKS_DIR, "serve_app.py"), "--port", str(args.app_port)]
+
+    with background_process(mock_command, dict(os.environ), os.path.join(log_dir, "mock_upstreams.log")):
+        await wait_until_ready(f"{mock_url}/health")
+        with background_process(app_command, app_environment(mock_url), os.path.join(log_dir, "app.log")):
+            await wait_until_ready(f"{app_url}/")
+            return await drive(args, app_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against mock upstreams")
+    parser.add_argument("--scenarios", default="weather,chat,natural",
+                        help="Comma-separated scenarios: weather, chat, natural")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per scenario")
+    parser.add_argument("--locations", type=int, default=200,
+                        help="Distinct locations to cycle through (controls cache hit rate)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request in seconds")
+    parser.add_argument("--app-url", help="Drive an already running API instead of starting one")
+    parser.add_argument("--app-port", type=int, default=9000)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, help="Seed the mock upstreams' latency and error sampling")
+    parser.add_argument("--log-dir", help="Where to write app and mock server logs (default: a temp dir)")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(scenario_factories(["x"]))
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    scenarios = asyncio.run(run(args))
+    config = {
+        key: getattr(args, key)
+        for key in ("concurrency", "requests", "warmup", "locations", "seed")
+    }
+    if not args.app_url:
+        for name in ("geocode", "weather", "gemini"):
+            config[f"{name}_latency"] = getattr(args, f"{name}_latency")
+            config[f"{name}_errors"] = getattr(args, f"{name}_errors")
+    emit({"benchmark": "load", "config": config, "scenarios": scenarios}, args.output)
+
+
+if __name__ == "__main__":
+    main()
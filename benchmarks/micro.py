@@ -0,0 +1,137 @@
+"""
+Micro-benchmarks for the CPU-bound parts of the request path: the clothing
+rule engine and the Pydantic models in app/models/schemas.py.
+
+Usage:
+    python benchmarks/micro.py [--repeat 5] [--filter clothing] [--output micro.json]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List
+
+from results import PROJECT_ROOT, emit
+
+sys.path.insert(0, PROJECT_ROOT)
+
+from app.models.schemas import (  # noqa: E402
+    ChatbotResponse,
+    ClothingRecommendation,
+    ForecastResponse,
+    ForecastSlot,
+    WeatherResponse
+)
+from app.services.clothing_service import ClothingService  # noqa: E402
+
+CONDITIONS = ("Clear", "Partly cloudy", "Light rain", "Heavy rain", "Snow", "Fog", "Windy", "Thunderstorm")
+
+
+def sample_observations(count: int) -> List[tuple]:
+    rng = random.Random(42)
+    return [
+        (round(rng.uniform(-15, 38), 1), rng.choice(CONDITIONS), float(rng.randint(20, 95)))
+        for _ in range(count)
+    ]
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    observations = sample_observations(256)
+    cycle = iter(range(10 ** 12))
+
+    def next_observation() -> tuple:
+        return observations[next(cycle) % len(observations)]
+
+    weather = WeatherResponse(location="Paris, France", temperature=14.5, weather_condition="Light rain",
+                              humidity=82, wind_speed=12.0)
+    recommendations, advice = ClothingService.get_recommendations_batch([(14.5, "Light rain", 82)])[0]
+    recommendation = ClothingRecommendation(
+        location=weather.location, weather=weather, recommendations=recommendations, general_advice=advice
+    )
+    chatbot = ChatbotResponse(
+        message="Here are your clothing recommendations for Paris, France!",
+        clothing_recommendation=recommendation,
+        gemini_response="Bring a waterproof jacket and an umbrella. " * 6
+    )
+    chatbot_json = chatbot.model_dump_json()
+    weather_payload = weather.model_dump()
+    forecast = ForecastResponse(
+        location=weather.location,
+        utc_offset_seconds=3600,
+        slots=[
+            ForecastSlot(time=f"2024-05-01T{hour % 24:02d}:00", temperature=temperature,
+                         weather_condition=condition, humidity=humidity, wind_speed=10.0,
+                         recommendations=slot_recommendations, general_advice=slot_advice)
+            for hour, ((temperature, condition, humidity), (slot_recommendations, slot_advice)) in enumerate(zip(
+                observations[:48], ClothingService.get_recommendations_batch(observations[:48])
+            ))
+        ]
+    )
+
+    def recommend() -> object:
+        temperature, condition, humidity = next_observation()
+        return ClothingService.get_clothing_recommendations(temperature, condition, humidity)
+
+    def advise() -> object:
+        temperature, condition, _ = next_observation()
+        return ClothingService.get_general_advice(temperature, condition)
+
+    return {
+        "clothing.recommendations": recommend,
+        "clothing.general_advice": advise,
+        "clothing.batch_48": lambda: ClothingService.get_recommendations_batch(observations[:48]),
+        "schemas.weather_response.validate": lambda: WeatherResponse.model_validate(weather_payload),
+        "schemas.clothing_recommendation.construct": lambda: ClothingRecommendation(
+            location=weather.location, weather=weather, recommendations=recommendations, general_advice=advice
+        ),
+        "schemas.chatbot_response.dump_json": chatbot.model_dump_json,
+        "schemas.chatbot_response.validate_json": lambda: ChatbotResponse.model_validate_json(chatbot_json),
+        "schemas.chatbot_response.json_dumps": lambda: json.dumps(chatbot.model_dump()),
+        "schemas.forecast_response_48.dump_json": forecast.model_dump_json
+    }
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    """
+    Time func in batches sized to take at least min_time each and report
+    per-call statistics across repeat batches
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    per_call = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    best = min(per_call)
+    return {
+        "calls_per_batch": number,
+        "ns_per_call_min": round(best * 1e9, 1),
+        "ns_per_call_median": round(statistics.median(per_call) * 1e9, 1),
+        "ops_per_second": round(1 / best, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark clothing rules and schemas")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed batches per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per batch")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    args = parser.parse_args()
+
+    cases = {name: func for name, func in build_cases().items() if args.filter in name}
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, args.repeat, args.min_time)
+        print(f"{name}: {results[name]['ns_per_call_min']} ns/call", file=sys.stderr)
+
+    emit({
+        "benchmark": "micro",
+        "config": {"repeat": args.repeat, "min_time": args.min_time, "filter": args.filter},
+        "cases": results
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Local stand-ins for the OpenCage, Dragon weather and Gemini APIs, with
+configurable latency and error distributions, for benchmarking.
+
+Latency profiles are written as "<kind>:<params>" in milliseconds:
+    fixed:20            always 20ms
+    uniform:5:50        uniformly between 5 and 50ms
+    lognormal:30:0.5    lognormal with a 30ms median and sigma 0.5
+
+Usage:
+    python benchmarks/mock_upstreams.py --port 9100 \
+        --geocode-latency lognormal:40:0.4 --weather-latency fixed:20 \
+        --gemini-latency lognormal:400:0.3 --gemini-errors 0.02
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+CONDITIONS = ("Clear", "Partly cloudy", "Cloudy", "Light rain", "Heavy rain", "Snow", "Fog", "Windy")
+
+
+@dataclass
+class UpstreamProfile:
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    error_status: int = 503
+
+    def sample_delay(self) -> float:
+        """
+        Draw one response delay in seconds from the latency profile
+        """
+        kind, *params = self.latency.split(":")
+        values = [float(param) for param in params]
+        if kind == "fixed":
+            delay_ms = values[0]
+        elif kind == "uniform":
+            delay_ms = random.uniform(values[0], values[1])
+        elif kind == "lognormal":
+            delay_ms = random.lognormvariate(0.0, values[1]) * values[0]
+        else:
+            raise ValueError(f"Unknown latency profile '{self.latency}'")
+        return max(delay_ms, 0.0) / 1000
+
+    async def simulate(self) -> bool:
+        """
+        Wait out a sampled delay; returns True when this response should fail
+        """
+        await asyncio.sleep(self.sample_delay())
+        return random.random() < self.error_rate
+
+
+def stable_fraction(text: str) -> float:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def coordinates_for(query: str) -> Tuple[float, float]:
+    """
+    Deterministic coordinates per place name, spread over the globe
+    """
+    return (
+        round(stable_fraction("lat:" + query) * 140 - 70, 4),
+        round(stable_fraction("lng:" + query) * 360 - 180, 4)
+    )
+
+
+def create_app(geocode: UpstreamProfile, weather: UpstreamProfile, gemini: UpstreamProfile) -> Starlette:
+    async def geocode_endpoint(request: Request) -> Response:
+        if await geocode.simulate():
+            return Response("Mock geocoding error", status_code=geocode.error_status)
+        query = request.query_params.get("q", "").strip()
+        # Names starting with "nowhere" exercise the not-found path
+        if not query or query.lower().startswith("nowhere"):
+            return JSONResponse({"results": [], "total_results": 0})
+        lat, lng = coordinates_for(query.lower())
+        return JSONResponse({
+            "results": [{
+                "formatted": f"{query.title()}, Benchland",
+                "geometry": {"lat": lat, "lng": lng}
+            }],
+            "total_results": 1
+        })
+
+    async def weather_endpoint(request: Request) -> Response:
+        if await weather.simulate():
+            return Response("Mock weather error", status_code=weather.error_status)
+        position = f"{request.query_params.get('lat')},{request.query_params.get('lon')}"
+        fraction = stable_fraction(position)
+        return JSONResponse({
+            "temperature": round(fraction * 45 - 10, 1),
+            "weather": CONDITIONS[int(fraction * 1000) % len(CONDITIONS)],
+            "humidity": round(20 + fraction * 75),
+            "wind_speed": round(fraction * 40, 1)
+        })
+
+    async def gemini_endpoint(request: Request) -> Response:
+        if await gemini.simulate():
+            return JSONResponse(
+                {"error": {"code": gemini.error_status, "message": "Mock Gemini error"}},
+                status_code=gemini.error_status
+            )
+        payload = await request.json()
+        prompt = payload["contents"][0]["parts"][0]["text"]
+        text = (
+            "Layer up with a light jacket and comfortable shoes; "
+            "it should be a pleasant day for a walk. " * 4
+        ).strip()
+        return JSONResponse({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 4,
+                "candidatesTokenCount": len(text) // 4
+            }
+        })
+
+    async def health(request: Request) -> Response:
+        return JSONResponse({"status": "ok"})
+
+    return Starlette(routes=[
+        Route("/geocode/v1/json", geocode_endpoint),
+        Route("/weather", weather_endpoint),
+        Route("/v1beta/models/{model}:generateContent", gemini_endpoint, methods=["POST"]),
+        Route("/health", health)
+    ])
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add --<upstream>-latency and --<upstream>-errors options for each mock upstream
+    """
+    defaults = {"geocode": "lognormal:40:0.4", "weather": "lognormal:25:0.4", "gemini": "lognormal:400:0.3"}
+    for name, latency in defaults.items():
+        parser.add_argument(f"--{name}-latency", default=latency, help=f"Latency profile for the mock {name} API")
+        parser.add_argument(f"--{name}-errors", type=float, default=0.0, help=f"Fraction of {name} calls that fail")
+
+
+def profiles_from_args(args: argparse.Namespace) -> Tuple[UpstreamProfile, UpstreamProfile, UpstreamProfile]:
+    return tuple(
+        UpstreamProfile(latency=getattr(args, f"{name}_latency"), error_rate=getattr(args, f"{name}_errors"))
+        for name in ("geocode", "weather", "gemini")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock upstream APIs for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, help="Seed latency and error sampling")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    for profile in profiles_from_args(args):
+        profile.sample_delay()  # Reject malformed profiles before serving
+    app = create_app(*profiles_from_args(args))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Run main:app under uvicorn for benchmarks, with Gemini calls sent to the mock
+server from mock_upstreams.py.
+
+The installed Gemini SDK only speaks gRPC for async calls, so a minimal
+stand-in for google.generativeai is registered before the app imports it.
+It posts each prompt to BENCH_GEMINI_URL over HTTP, which keeps the mock's
+latency and error distributions in the request path. OpenCage and weather
+calls go through the app's real HTTP client (see OPENCAGE_BASE_URL and
+WEATHER_BASE_URL).
+
+Usage:
+    BENCH_GEMINI_URL=http://127.0.0.1:9100 python benchmarks/serve_app.py --port 9000
+"""
+import argparse
+import os
+import sys
+import types
+from typing import AsyncIterator, List
+
+import httpx
+import uvicorn
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MockGeminiResponse:
+    def __init__(self, text: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.text = text
+        self.parts = [text] if text else []
+        self.usage_metadata = types.SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=completion_tokens
+        )
+
+
+class MockGeminiStream:
+    def __init__(self, chunks: List[str]):
+        self._chunks = chunks
+
+    async def __aiter__(self) -> AsyncIterator[MockGeminiResponse]:
+        for chunk in self._chunks:
+            yield MockGeminiResponse(chunk)
+
+
+class MockGenerativeModel:
+    client = None
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        if MockGenerativeModel.client is None:
+            MockGenerativeModel.client = httpx.AsyncClient(base_url=os.environ["BENCH_GEMINI_URL"], timeout=30)
+        response = await MockGenerativeModel.client.post(
+            f"/v1beta/models/{self.model_name}:generateContent",
+            json={"contents": [{"parts": [{"text": prompt}]}]}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Mock Gemini returned {response.status_code}")
+        payload = response.json()
+        text = payload["candidates"][0]["content"]["parts"][0]["text"]
+        if stream:
+            words = text.split(" ")
+            return MockGeminiStream([" ".join(words[i:i + 8]) + " " for i in range(0, len(words), 8)])
+        usage = payload.get("usageMetadata", {})
+        return MockGeminiResponse(text, usage.get("promptTokenCount", 0), usage.get("candidatesTokenCount", 0))
+
+
+def install_mock_gemini() -> None:
+    module = types.ModuleType("google.generativeai")
+    module.configure = lambda **kwargs: None
+    module.GenerativeModel = MockGenerativeModel
+    sys.modules["google.generativeai"] = module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+
+    if "BENCH_GEMINI_URL" not in os.environ:
+        parser.error("BENCH_GEMINI_URL must point at the mock upstream server")
+
+    install_mock_gemini()
+    sys.path.insert(0, PROJECT_ROOT)
+    os.chdir(PROJECT_ROOT)
+    from main import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Startup-time benchmark: how long a fresh worker takes to import the app and
+run its lifespan startup, and whether the Gemini SDK was loaded on the way.
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [--output startup.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from results import PROJECT_ROOT, emit
+
+# Runs in a fresh interpreter so every measurement is a cold start
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run_lifespan():
+    async with main.lifespan(main.app):
+        pass
+
+asyncio.run(run_lifespan())
+finished = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "startup_seconds": finished - started,
+    "gemini_sdk_loaded": "google.generativeai" in sys.modules
+}))
+"""
+
+
+def measure(runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    import_times = [sample["import_seconds"] for sample in samples]
+    startup_times = [sample["startup_seconds"] for sample in samples]
+    return {
+        "benchmark": "startup",
+        "runs": runs,
+        "import_seconds_median": statistics.median(import_times),
+        "startup_seconds_median": statistics.median(startup_times),
+        "startup_seconds_max": max(startup_times),
+        "gemini_sdk_loaded": any(sample["gemini_sdk_loaded"] for sample in samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the API")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    args = parser.parse_args()
+
+    emit(measure(args.runs), args.output)
+
+
+if __name__ == "__main__":
+    main()
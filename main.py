@@ -1,20 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import uvicorn
 
 from app.config.settings import APP_TITLE, APP_DESCRIPTION, APP_VERSION
-from app.routers import chat, weather
+from app.routers import chat, subscriptions, weather
+from app.services.http_client import HTTPClient
+from app.services.gemini_service import GeminiService
+from app.services.weather_service import WeatherService
+from app.services.compression import CompressionMiddleware
+from app.services.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, render_metrics
+from app.services.prefetch import prefetcher
+from app.services.rate_limit import quota_manager
+from app.services.subscriptions import subscription_hub
+from app.services.shared_cache import SharedCache
+from app.services.tracing import setup_tracing, shutdown_tracing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared upstream HTTP client once per worker
+    setup_tracing()
+    await HTTPClient.startup()
+    await quota_manager.startup()
+    await SharedCache.startup()
+    WeatherService.load_gazetteer()
+    GeminiService.load_response_cache()
+    await prefetcher.start()
+    try:
+        yield
+    finally:
+        await subscription_hub.stop()
+        await prefetcher.stop()
+        GeminiService.save_response_cache()
+        WeatherService.close_gazetteer()
+        await SharedCache.shutdown()
+        await quota_manager.shutdown()
+        await HTTPClient.shutdown()
+        shutdown_tracing()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=APP_TITLE,
     description=APP_DESCRIPTION,
-    version=APP_VERSION
+    version=APP_VERSION,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -26,9 +62,16 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Compress large JSON/text responses (gzip or brotli, negotiated per request)
+app.add_middleware(CompressionMiddleware)
+
+# Track in-flight requests and latency per router
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(weather.router)
+app.include_router(subscriptions.router)
 
 
 @app.get("/")
@@ -38,12 +81,23 @@ async def root():
         "endpoints": {
             "/chat/": "POST - Get basic clothing recommendations for a location",
             "/chat/enhanced": "POST - Get enhanced clothing recommendations with Gemini AI conversation",
+            "/chat/stream": "POST - Stream clothing recommendations and Gemini AI response as Server-Sent Events",
+            "/chat/natural/stream": "POST - Stream a natural Gemini AI conversation as Server-Sent Events",
+            "/chat/batch": "POST - Get clothing recommendations for many locations at once",
             "/weather/{location}": "GET - Get weather data for a location",
+            "/weather/{location}/forecast": "GET - Get the hourly forecast with clothing recommendations per slot",
+            "/weather/subscribe": "WebSocket - Subscribe to clothing recommendation changes for locations",
+            "/metrics": "GET - Prometheus metrics",
             "/docs": "GET - API documentation"
         },
         "note": "Use /chat/enhanced for conversational responses with Gemini AI. Set GEMINI_API_KEY environment variable for full functionality."
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
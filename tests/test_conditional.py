@@ -0,0 +1,37 @@
+import time
+
+from starlette.requests import Request
+
+from app.routers.conditional import ObservationValidators
+
+ETAG = '"abc"'
+
+
+def make_request(method: str, **headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": method,
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    })
+
+
+def validators() -> ObservationValidators:
+    return ObservationValidators(ETAG, time.time() - 60, 60, public=False)
+
+
+def test_explicit_etag_matches_on_post():
+    assert validators().is_not_modified(make_request("POST", if_none_match=f'W/{ETAG}, "other"'))
+    assert not validators().is_not_modified(make_request("POST", if_none_match='"other"'))
+
+
+def test_wildcard_only_matches_safe_methods():
+    assert validators().is_not_modified(make_request("GET", if_none_match="*"))
+    assert validators().is_not_modified(make_request("HEAD", if_none_match="*"))
+    # A new question must not be answered with an empty 304
+    assert not validators().is_not_modified(make_request("POST", if_none_match="*"))
+
+
+def test_if_modified_since_ignored_on_post():
+    since = "Wed, 21 Oct 2099 07:28:00 GMT"
+    assert validators().is_not_modified(make_request("GET", if_modified_since=since))
+    assert not validators().is_not_modified(make_request("POST", if_modified_since=since))
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from app.models.schemas import WeatherResponse
+from app.services import forecast_service
+from app.services.forecast_service import ForecastProvider, ForecastService, create_forecast_provider
+from app.services.weather_service import WeatherService
+
+NOW = datetime(2024, 5, 1, 10, 30)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("What should I wear tomorrow at 8am?", datetime(2024, 5, 2, 8)),
+    ("Will I need a coat in 3 hours?", datetime(2024, 5, 1, 13, 30)),
+    ("Do I need a jacket at 12am?", datetime(2024, 5, 2, 0)),
+    ("What about tonight?", datetime(2024, 5, 1, 20)),
+    ("And this afternoon?", datetime(2024, 5, 1, 15)),
+    ("What should I wear at 8am?", datetime(2024, 5, 2, 8)),
+    ("Is it cold at 18:30?", datetime(2024, 5, 1, 18)),
+])
+def test_parse_target_time(question, expected):
+    assert ForecastService.mentions_future_time(question)
+    assert ForecastService.parse_target_time(question, NOW) == expected
+
+
+def test_this_morning_before_and_after_the_morning():
+    early = datetime(2024, 5, 1, 7, 15)
+    assert ForecastService.parse_target_time("Coat this morning?", early) == datetime(2024, 5, 1, 9)
+    # The morning has passed: not tomorrow morning, but no forecast slot at all
+    assert ForecastService.parse_target_time("Coat this morning?", NOW) is None
+
+
+def test_tonight_after_the_evening_is_not_tomorrow():
+    assert ForecastService.parse_target_time("What about tonight?", datetime(2024, 5, 1, 23, 10)) is None
+
+
+def test_questions_without_a_time_use_current_weather():
+    assert not ForecastService.mentions_future_time("What should I wear?")
+
+
+class FailingProvider(ForecastProvider):
+    async def fetch(self, lat, lng):
+        raise HTTPException(status_code=503, detail="Unable to connect to forecast API")
+
+
+@pytest.fixture
+def berlin(monkeypatch):
+    async def get_coordinates(location):
+        return 52.52, 13.405, "Berlin, Germany"
+
+    async def get_weather_for_location(location):
+        return WeatherResponse(location="Berlin, Germany", temperature=18.0, weather_condition="Clear")
+
+    monkeypatch.setattr(WeatherService, "get_coordinates", staticmethod(get_coordinates))
+    monkeypatch.setattr(WeatherService, "get_weather_for_location", staticmethod(get_weather_for_location))
+    forecast_service.forecast_cache.clear()
+    yield
+    forecast_service.forecast_cache.clear()
+
+
+def test_fixture_provider_answers_future_questions(berlin, monkeypatch):
+    monkeypatch.setattr(forecast_service, "forecast_provider", create_forecast_provider("fixture"))
+
+    match = asyncio.run(ForecastService.find_slot_for_question("Berlin", "What should I wear tomorrow at 8am?"))
+
+    assert match is not None
+    formatted_location, slot = match
+    assert formatted_location == "Berlin, Germany"
+    assert slot.time.endswith("T08:00")
+    assert slot.temperature == 11
+    assert slot.recommendations
+
+
+def test_forecast_failure_falls_back_to_current_weather(berlin, monkeypatch):
+    monkeypatch.setattr(forecast_service, "forecast_provider", FailingProvider())
+
+    assert asyncio.run(ForecastService.find_slot_for_question("Berlin", "Coat tomorrow at 8am?")) is None
+
+    response = TestClient(main.app).post("/chat/", json={"location": "Berlin", "question": "Coat tomorrow at 8am?"})
+    assert response.status_code == 200
+    assert response.json()["clothing_recommendation"]["weather"]["temperature"] == 18.0
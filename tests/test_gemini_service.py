@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.services import gemini_service, resilience
+from app.services.gemini_service import GeminiService, gemini_upstream
+from app.services.rate_limit import RateLimitExceeded
+from app.services.resilience import CircuitBreaker, RetryBudget
+
+
+class Response:
+    def __init__(self, text=None):
+        self.parts = [text] if text else []
+        self._text = text
+        self.usage_metadata = None
+
+    @property
+    def text(self):
+        # Like the SDK: reading .text of a blocked (part-less) answer raises
+        if not self.parts:
+            raise ValueError("The response was blocked")
+        return self._text
+
+
+class Model:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, stream=False):
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def model(monkeypatch):
+    def install(*outcomes):
+        fake = Model(*outcomes)
+        monkeypatch.setattr(gemini_service, "_model", fake)
+        return fake
+
+    monkeypatch.setattr(resilience, "UPSTREAM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(gemini_upstream, "breaker", CircuitBreaker("gemini", failure_threshold=5, recovery_timeout=60))
+    monkeypatch.setattr(gemini_upstream, "retry_budget", RetryBudget(ratio=0, max_tokens=100))
+    monkeypatch.setattr(gemini_upstream, "hedge", False)
+    return install
+
+
+def test_blocked_answer_is_not_retried(model):
+    fake = model(Response())
+
+    for _ in range(6):
+        assert asyncio.run(GeminiService.generate_text("prompt")) is None
+
+    assert fake.calls == 6
+    assert gemini_upstream.breaker.state == "closed"
+
+
+def test_permanent_error_is_not_retried_or_counted(model):
+    fake = model(google_exceptions.InvalidArgument("bad request"))
+
+    for _ in range(6):
+        with pytest.raises(google_exceptions.InvalidArgument):
+            asyncio.run(GeminiService.generate_text("prompt"))
+
+    assert fake.calls == 6
+    assert gemini_upstream.breaker.state == "closed"
+
+
+def test_transient_error_is_retried(model):
+    fake = model(google_exceptions.ServiceUnavailable("try again"), Response("answer"))
+
+    assert asyncio.run(GeminiService.generate_text("prompt")) == "answer"
+    assert fake.calls == 2
+
+
+def test_quota_exhaustion_is_not_retried(model):
+    fake = model(google_exceptions.ResourceExhausted("quota"))
+
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(GeminiService.generate_text("prompt"))
+
+    assert fake.calls == 1
+    assert gemini_upstream.breaker.failures == 1
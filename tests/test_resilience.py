@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import time
+
+import httpx
+import pytest
+
+from app.services import resilience
+from app.services.http_client import HTTPClient
+from app.services.rate_limit import RateLimitExceeded
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, Upstream
+
+URL = "http://upstream.test/data"
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """
+    Route HTTPClient through an httpx.MockTransport whose behavior each test
+    sets with a list of steps: an int status, ("delay", seconds, status) or
+    "hang"; the last step repeats
+    """
+    state = {"steps": [200], "calls": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        step = state["steps"][min(state["calls"], len(state["steps"]) - 1)]
+        state["calls"] += 1
+        if step == "hang":
+            await asyncio.sleep(3600)
+        if isinstance(step, tuple):
+            _, delay, step = step
+            await asyncio.sleep(delay)
+        return httpx.Response(step, json={"call": state["calls"]})
+
+    monkeypatch.setattr(resilience, "UPSTREAM_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(HTTPClient, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(HTTPClient, "_host_semaphores", {})
+    monkeypatch.setattr(HTTPClient, "_upstreams", {})
+    return state
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_half_open_allows_one_probe_then_closes():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_call()
+    assert breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=5, recovery_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_http_breaker_opens_and_recovers(fake_upstream):
+    fake_upstream["steps"] = [503]
+    upstream = HTTPClient.get_upstream(URL)
+    upstream.breaker = CircuitBreaker("upstream.test", failure_threshold=2, recovery_timeout=0.05)
+
+    for _ in range(2):
+        assert run(HTTPClient.get(URL)).status_code == 503
+    calls = fake_upstream["calls"]
+    with pytest.raises(CircuitOpenError):
+        run(HTTPClient.get(URL))
+    assert fake_upstream["calls"] == calls
+
+    time.sleep(0.06)
+    fake_upstream["steps"] = [200]
+    fake_upstream["calls"] = 0
+    assert run(HTTPClient.get(URL)).status_code == 200
+    assert upstream.breaker.state == "closed"
+
+
+def test_retries_until_success(fake_upstream):
+    fake_upstream["steps"] = [503, 502, 200]
+
+    response = run(HTTPClient.get(URL))
+
+    assert response.status_code == 200
+    assert fake_upstream["calls"] == 3
+
+
+def test_retry_budget_exhaustion_stops_retries(fake_upstream):
+    fake_upstream["steps"] = [503]
+    upstream = HTTPClient.get_upstream(URL)
+    upstream.retry_budget = RetryBudget(ratio=0, max_tokens=1)
+
+    assert run(HTTPClient.get(URL)).status_code == 503
+    assert fake_upstream["calls"] == 2  # the single budget token paid for one retry
+
+    assert run(HTTPClient.get(URL)).status_code == 503
+    assert fake_upstream["calls"] == 3  # budget empty: no retry
+
+
+def test_hedged_request_wins_over_slow_attempt(fake_upstream, monkeypatch):
+    monkeypatch.setattr(resilience, "UPSTREAM_HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(resilience, "UPSTREAM_HEDGE_MIN_DELAY", 0.01)
+    fake_upstream["steps"] = [("delay", 1.0, 200), 200]
+    upstream = HTTPClient.get_upstream(URL)
+    upstream.hedge = True
+    upstream.latency.record(0.02)
+
+    started = time.monotonic()
+    response = run(HTTPClient.get(URL))
+
+    assert response.status_code == 200
+    assert response.json() == {"call": 2}
+    assert fake_upstream["calls"] == 2
+    assert time.monotonic() - started < 0.5
+
+
+def test_hedging_disabled_without_enough_samples():
+    upstream = Upstream("test", hedge=True)
+    assert upstream.hedge_delay() is None
+
+
+def test_deadline_covers_all_attempts(fake_upstream, caplog):
+    fake_upstream["steps"] = ["hang"]
+    upstream = HTTPClient.get_upstream(URL)
+    upstream.deadline = 0.2
+
+    started = time.monotonic()
+    with caplog.at_level(logging.WARNING), pytest.raises(httpx.TimeoutException):
+        run(HTTPClient.get(URL))
+
+    assert time.monotonic() - started < 0.5
+    assert fake_upstream["calls"] == 1
+    # Timeout messages can be empty, so the log names the exception type
+    assert "TimeoutException(" in caplog.text
+
+
+def test_retry_after_fast_failure_fits_in_deadline(fake_upstream):
+    fake_upstream["steps"] = [503, ("delay", 0.05, 200)]
+    upstream = HTTPClient.get_upstream(URL)
+    upstream.deadline = 1.0
+
+    assert run(HTTPClient.get(URL)).status_code == 200
+    assert fake_upstream["calls"] == 2
+
+
+def test_upstream_429_is_not_retried(fake_upstream):
+    fake_upstream["steps"] = [429]
+
+    with pytest.raises(RateLimitExceeded) as raised:
+        run(HTTPClient.get(URL))
+
+    assert fake_upstream["calls"] == 1
+    assert raised.value.headers["Retry-After"] == "1"
+    assert HTTPClient.get_upstream(URL).breaker.failures == 1
+
+
+def test_upstream_429_honors_retry_after(fake_upstream, monkeypatch):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        fake_upstream["calls"] += 1
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    monkeypatch.setattr(HTTPClient, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    with pytest.raises(RateLimitExceeded) as raised:
+        run(HTTPClient.get(URL))
+
+    assert fake_upstream["calls"] == 1
+    assert raised.value.retry_after == 30